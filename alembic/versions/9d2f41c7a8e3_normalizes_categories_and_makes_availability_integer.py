@@ -0,0 +1,163 @@
+"""Normalizes categories into a lookup table and makes availability an integer
+
+Revision ID: 9d2f41c7a8e3
+Revises: '416a1e9725f3'
+Create Date: 2026-10-18 12:48:12.301644
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2f41c7a8e3'
+down_revision: Union[str, None] = '416a1e9725f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_OLD_SQLITE_TRIGGERS = {
+    "books_fts_ai": """AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, category) VALUES (new.id, new.title, new.category);
+    END""",
+    "books_fts_ad": """AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, category) VALUES ('delete', old.id, old.title, old.category);
+    END""",
+    "books_fts_au": """AFTER UPDATE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, category) VALUES ('delete', old.id, old.title, old.category);
+        INSERT INTO books_fts(rowid, title, category) VALUES (new.id, new.title, new.category);
+    END""",
+}
+
+# The search layout this revision installs, inlined so replaying it doesn't
+# depend on what api/search.py does later: SQLite indexes a books/categories
+# view; Postgres keeps a title vector on books and a name vector on categories.
+_CATEGORY_NAME = "(SELECT name FROM categories WHERE id = {row}.category_id)"
+_NEW_SQLITE_TRIGGERS = {
+    "books_fts_ai": f"""AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, category) VALUES (new.id, new.title, {_CATEGORY_NAME.format(row="new")});
+    END""",
+    "books_fts_ad": f"""AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, category) VALUES ('delete', old.id, old.title, {_CATEGORY_NAME.format(row="old")});
+    END""",
+    "books_fts_au": f"""AFTER UPDATE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, category) VALUES ('delete', old.id, old.title, {_CATEGORY_NAME.format(row="old")});
+        INSERT INTO books_fts(rowid, title, category) VALUES (new.id, new.title, {_CATEGORY_NAME.format(row="new")});
+    END""",
+}
+
+
+def _drop_old_search(bind):
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_books_search_vector")
+        op.execute("ALTER TABLE books DROP COLUMN IF EXISTS search_vector")
+    elif bind.dialect.name == "sqlite":
+        for name in _OLD_SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS books_fts")
+
+def _create_old_search(bind):
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            "ALTER TABLE books ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(category, '')), 'B')) STORED"
+        )
+        op.execute("CREATE INDEX ix_books_search_vector ON books USING gin (search_vector)")
+    elif bind.dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE books_fts USING fts5(title, category, content='books', "
+            "content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        for name, body in _OLD_SQLITE_TRIGGERS.items():
+            op.execute(f"CREATE TRIGGER {name} {body}")
+        op.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+def _create_new_search(bind):
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            "ALTER TABLE books ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A')) STORED"
+        )
+        op.execute("CREATE INDEX ix_books_search_vector ON books USING gin (search_vector)")
+        op.execute(
+            "ALTER TABLE categories ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(name, '')), 'B')) STORED"
+        )
+    elif bind.dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIEW books_fts_source AS SELECT books.id, books.title, categories.name AS category "
+            "FROM books LEFT JOIN categories ON categories.id = books.category_id"
+        )
+        op.execute(
+            "CREATE VIRTUAL TABLE books_fts USING fts5(title, category, content='books_fts_source', "
+            "content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        for name, body in _NEW_SQLITE_TRIGGERS.items():
+            op.execute(f"CREATE TRIGGER {name} {body}")
+        op.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+def _drop_new_search(bind):
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_books_search_vector")
+        op.execute("ALTER TABLE books DROP COLUMN IF EXISTS search_vector")
+        op.execute("ALTER TABLE categories DROP COLUMN IF EXISTS search_vector")
+    elif bind.dialect.name == "sqlite":
+        for name in _NEW_SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS books_fts")
+        op.execute("DROP VIEW IF EXISTS books_fts_source")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # The search objects read books.category, so they are rebuilt around the change.
+    _drop_old_search(bind)
+
+    op.create_table('categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.execute("INSERT INTO categories (name) SELECT DISTINCT category FROM books WHERE category IS NOT NULL ORDER BY category")
+
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.add_column(sa.Column('category_id', sa.Integer(), nullable=True))
+    op.execute("UPDATE books SET category_id = (SELECT id FROM categories WHERE categories.name = books.category)")
+
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.drop_index('ix_books_category_price')
+        batch_op.drop_index('ix_books_category')
+        batch_op.drop_column('category')
+        batch_op.alter_column('availability', existing_type=sa.String(), type_=sa.Integer(),
+                              postgresql_using="NULLIF(availability, '')::integer")
+        batch_op.create_foreign_key('books_category_id_fkey', 'categories', ['category_id'], ['id'])
+        batch_op.create_index('ix_books_category_id', ['category_id'], unique=False)
+        batch_op.create_index('ix_books_category_id_price', ['category_id', 'price'], unique=False)
+
+    _create_new_search(bind)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    _drop_new_search(bind)
+
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.add_column(sa.Column('category', sa.String(), nullable=True))
+    op.execute("UPDATE books SET category = (SELECT name FROM categories WHERE categories.id = books.category_id)")
+
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.drop_index('ix_books_category_id_price')
+        batch_op.drop_index('ix_books_category_id')
+        # SQLite keeps no FK names; its batch copy drops the key with the column.
+        if bind.dialect.name != "sqlite":
+            batch_op.drop_constraint('books_category_id_fkey', type_='foreignkey')
+        batch_op.drop_column('category_id')
+        batch_op.alter_column('availability', existing_type=sa.Integer(), type_=sa.String(),
+                              postgresql_using="availability::text")
+        batch_op.create_index('ix_books_category', ['category'], unique=False)
+        batch_op.create_index('ix_books_category_price', ['category', 'price'], unique=False)
+
+    op.drop_table('categories')
+    _create_old_search(bind)
@@ -0,0 +1,63 @@
+"""Adds full-text search index for books.
+
+Revision ID: c3d5e8a1f2b7
+Revises: 'b599adbbb33d'
+Create Date: 2026-10-18 12:31:04.512218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d5e8a1f2b7'
+down_revision: Union[str, None] = 'b599adbbb33d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The search objects as they were at this revision (books.category was still
+# text); later migrations inline their own layouts the same way.
+_SQLITE_TRIGGERS = {
+    "books_fts_ai": """AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, category) VALUES (new.id, new.title, new.category);
+    END""",
+    "books_fts_ad": """AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, category) VALUES ('delete', old.id, old.title, old.category);
+    END""",
+    "books_fts_au": """AFTER UPDATE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, category) VALUES ('delete', old.id, old.title, old.category);
+        INSERT INTO books_fts(rowid, title, category) VALUES (new.id, new.title, new.category);
+    END""",
+}
+
+
+def upgrade() -> None:
+    # Postgres: weighted tsvector generated column + GIN index.
+    # SQLite: FTS5 table kept in sync with books by triggers.
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            "ALTER TABLE books ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(category, '')), 'B')) STORED"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_books_search_vector ON books USING gin (search_vector)")
+    elif bind.dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(title, category, content='books', "
+            "content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        for name, body in _SQLITE_TRIGGERS.items():
+            op.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+        op.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_books_search_vector")
+        op.execute("ALTER TABLE books DROP COLUMN IF EXISTS search_vector")
+    elif bind.dialect.name == "sqlite":
+        for name in _SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS books_fts")
@@ -0,0 +1,62 @@
+"""Moves stored product URLs under /catalogue/
+
+Revision ID: e4a7b2c91d05
+Revises: '9d2f41c7a8e3'
+Create Date: 2026-10-18 14:02:37.518204
+
+"""
+from typing import Sequence, Union
+from urllib.parse import urlsplit, urlunsplit
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7b2c91d05'
+down_revision: Union[str, None] = '9d2f41c7a8e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+books = sa.table('books', sa.column('id', sa.Integer), sa.column('product_url', sa.String))
+
+
+def _catalogue_url(url):
+    """Product links used to be joined to the site root ("<site>/<slug>/index.html")
+    instead of the listing page, which lands them under /catalogue/."""
+    if not url:
+        return url
+    parts = urlsplit(url)
+    path = parts.path.lstrip('/')
+    if path.startswith('catalogue/') or path.count('/') != 1 or not path.endswith('/index.html'):
+        return url
+    return urlunsplit(parts._replace(path=f'/catalogue/{path}'))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(books.c.id, books.c.product_url)).all()
+    stored = {url for _, url in rows}
+    changed = deleted = 0
+    for book_id, url in rows:
+        new_url = _catalogue_url(url)
+        if new_url == url:
+            continue
+        if new_url in stored:
+            # A crawl already upserted this book under its new URL; that row is the current one.
+            bind.execute(books.delete().where(books.c.id == book_id))
+            deleted += 1
+        else:
+            bind.execute(books.update().where(books.c.id == book_id).values(product_url=new_url))
+        changed += 1
+    if deleted:
+        # The stored /stats counted the deleted duplicates. Without them the API
+        # computes the stats live until the next load stores them again.
+        bind.execute(sa.text("DELETE FROM book_stats"))
+    if changed:
+        # Cached responses, snapshots and feature matrices are keyed on the dataset version.
+        bind.execute(sa.text("UPDATE dataset_version SET version = version + 1 WHERE id = 1"))
+
+
+def downgrade() -> None:
+    # The old URLs pointed at pages that don't exist; there is nothing to restore.
+    pass
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+from prometheus_client import Counter
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api import crud_async
+from api.serialization import dumps
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", 3600))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+# How long a worker trusts the dataset version it last read before asking the DB again.
+VERSION_CHECK_SECONDS = float(os.getenv("CACHE_VERSION_CHECK_SECONDS", 2))
+
+cache_requests = Counter(
+    "api_response_cache_requests_total",
+    "Cached read endpoint lookups by result (not_modified, hit_local, hit_shared, miss).",
+    ["route", "result"],
+)
+
+
+class LRUCache:
+    """Bounded in-process cache; the least recently used entry goes first."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, bytes] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class RedisCache:
+    """Shared cache on any client with Redis' get/set(ex=) API (redis-py, fakeredis...)."""
+
+    def __init__(self, client, ttl: int = CACHE_TTL_SECONDS, prefix: str = "books-api:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCache":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_REDIS_URL requires 'redis' (pip install redis).") from e
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Shared cache read failed: {e}")
+            return None
+
+    def set(self, key: str, value: bytes):
+        try:
+            self.client.set(self.prefix + key, value, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Shared cache write failed: {e}")
+
+
+class ResponseCache:
+    """Two-level cache of serialized responses: worker-local LRU in front of an optional shared backend."""
+
+    def __init__(self, local: LRUCache, shared: Optional[RedisCache] = None):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key: str) -> tuple[Optional[bytes], str]:
+        value = self.local.get(key)
+        if value is not None:
+            return value, "hit_local"
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+                return value, "hit_shared"
+        return None, "miss"
+
+    def set(self, key: str, value: bytes):
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+
+response_cache = ResponseCache(
+    LRUCache(),
+    RedisCache.from_url(CACHE_REDIS_URL) if CACHE_REDIS_URL else None,
+)
+
+_version = None
+_version_checked_at = 0.0
+
+async def dataset_version(db: AsyncSession) -> int:
+    """The dataset version bumped by populate_database, re-read every VERSION_CHECK_SECONDS."""
+    global _version, _version_checked_at
+    now = time.monotonic()
+    if _version is None or now - _version_checked_at >= VERSION_CHECK_SECONDS:
+        _version = await crud_async.get_dataset_version(db)
+        _version_checked_at = now
+    return _version
+
+
+def cache_key(request: Request, version: int) -> str:
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"v{version}:{request.url.path}?{params}"
+
+
+def etag_for(key: str) -> str:
+    """Strong ETag of a cache key: same dataset version and params, same bytes."""
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so a W/ prefix still matches.
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _pack(body: bytes, headers: dict) -> bytes:
+    return json.dumps(headers).encode() + b"\n" + body
+
+def _unpack(entry: bytes) -> tuple[bytes, dict]:
+    headers, body = entry.split(b"\n", 1)
+    return body, json.loads(headers)
+
+
+async def cached_response(request: Request, db: AsyncSession, route: str, adapter: Optional[TypeAdapter],
+                          compute: Callable[[int], Awaitable[Any]],
+                          headers: Optional[Callable[[Any], dict]] = None) -> Response:
+    """Serves `await compute(version)` serialized with `adapter`, from cache when the dataset version allows.
+
+    `compute` gets the dataset version the cache key was built from, so
+    answers from in-memory backends (the catalog snapshot) match that version.
+
+    Without an adapter, `compute` must return plain rows already shaped
+    like the response model, and they are dumped with orjson. `headers`, if given, derives extra response headers from the computed
+    data; they are cached along with the body. A request whose If-None-Match
+    holds the current ETag gets a 304 before any lookup or query.
+    """
+    version = await dataset_version(db)
+    key = cache_key(request, version)
+    etag = etag_for(key)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        cache_requests.labels(route=route, result="not_modified").inc()
+        return Response(status_code=304, headers={"ETag": etag})
+
+    entry, result = response_cache.get(key)
+    cache_requests.labels(route=route, result=result).inc()
+
+    if entry is None:
+        if adapter is None:
+            data = await compute(version)
+            body = dumps(data)
+        else:
+            data = adapter.validate_python(await compute(version), from_attributes=True)
+            body = adapter.dump_json(data)
+        entry = _pack(body, headers(data) if headers else {})
+        response_cache.set(key, entry)
+
+    body, extra_headers = _unpack(entry)
+    return Response(content=body, media_type="application/json", headers={**extra_headers, "ETag": etag})
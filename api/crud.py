@@ -1,34 +1,57 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, or_, and_
-from api import models, schemas
-from typing import List, Optional
+from sqlalchemy import func, desc, select
+from sqlalchemy.exc import IntegrityError
+from api import models, schemas, search, search_index
+from typing import List, Optional, Tuple
 
 
 def get_book_id(db: Session, book_id: int):
     return db.query(models.Book).filter(models.Book.id == book_id).first()
 
-def get_books(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Book).offset(skip).limit(limit).all()
-
-def search_books(db: Session, title: Optional[str], category: Optional[str], limit: int = 100):
-    query = db.query(models.Book)
-    filters = []
-    if title:
-        filters.append(models.Book.title.ilike(f"%{title}%"))
-    if category:
-        filters.append(models.Book.category.ilike(f"%{category}%"))
-    if filters:
-        query = query.filter(and_(*filters))
-    
-    return query.limit(limit).all()
+def get_books(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+    query = db.query(models.Book).order_by(models.Book.id)
+    if after_id is not None:
+        # Keyset pagination: seek past the last id instead of scanning `skip` rows.
+        return query.filter(models.Book.id > after_id).limit(limit).all()
+    return query.offset(skip).limit(limit).all()
+
+# Columns of schemas.Book, selected as plain tuples for the orjson fast path;
+# the category name comes from the categories lookup (see book_rows_query).
+book_columns = [
+    models.Category.name.label("category") if field == "category" else getattr(models.Book, field)
+    for field in schemas.Book.model_fields
+]
+
+def book_rows_query():
+    return select(*book_columns).select_from(models.Book).outerjoin(models.Category)
+
+def get_book_rows(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[dict]:
+    """Same page as get_books, as dicts ready for orjson instead of ORM objects."""
+    query = book_rows_query().order_by(models.Book.id)
+    if after_id is not None:
+        query = query.where(models.Book.id > after_id)
+    else:
+        query = query.offset(skip)
+    return [row._asdict() for row in db.execute(query.limit(limit))]
+
+def search_books(db: Session, title: Optional[str], category: Optional[str], limit: int = 100,
+                 after: Optional[Tuple[float, int]] = None):
+    """Ranked full-text search; returns (book, rank) pairs, see api.search."""
+    if search_index.SEARCH_BACKEND == "memory":
+        return search_index.search_books(db, title=title, category=category, limit=limit, after=after)
+    return search.search_books(db, title=title, category=category, limit=limit, after=after)
+
+# Only categories that still have books; a reload can leave unused ones behind.
+categories_query = select(models.Category.name).where(
+    select(models.Book.id).where(models.Book.category_id == models.Category.id).exists()
+).order_by(models.Category.name)
 
 def get_categories(db: Session):
-    query_result  = db.query(models.Book.category).distinct().order_by(models.Book.category).all()
-    return [category[0] for category in query_result]
+    return db.execute(categories_query).scalars().all()
 
 #------------------------------------------------------------------------------------------------------#
 
-def get_stats_overview(db: Session) -> schemas.StatsOverview:
+def compute_stats_overview(db: Session) -> schemas.StatsOverview:
     total_books = db.query(models.Book).count()
     avg_price = db.query(func.avg(models.Book.price)).scalar()
 
@@ -45,13 +68,21 @@ def get_stats_overview(db: Session) -> schemas.StatsOverview:
         rating_distribution=rating_distribution
     )
 
-def get_stats_categories(db: Session) -> List[schemas.CategoryStats]:
-    query_result = db.query(
-        models.Book.category,
-        func.count(models.Book.id).label('book_count')
-    ,
-    func.avg(models.Book.price).label('average_price')
-    ).group_by(models.Book.category).order_by(desc('book_count')).all()
+def category_stats_query():
+    """Groups books on the integer category_id, then names the groups."""
+    per_category = select(
+        models.Book.category_id,
+        func.count(models.Book.id).label('book_count'),
+        func.avg(models.Book.price).label('average_price')
+    ).group_by(models.Book.category_id).subquery()
+    return select(
+        models.Category.name.label('category'), per_category.c.book_count, per_category.c.average_price
+    ).select_from(per_category).outerjoin(
+        models.Category, models.Category.id == per_category.c.category_id
+    ).order_by(desc(per_category.c.book_count))
+
+def compute_stats_categories(db: Session) -> List[schemas.CategoryStats]:
+    query_result = db.execute(category_stats_query()).all()
 
     stats = [
         schemas.CategoryStats(
@@ -62,8 +93,43 @@ def get_stats_categories(db: Session) -> List[schemas.CategoryStats]:
     ]
     return stats
 
+def refresh_book_stats(db: Session):
+    """Recomputes the stored /stats payloads; the caller commits."""
+    payloads = {
+        "overview": compute_stats_overview(db).model_dump(),
+        "categories": [c.model_dump() for c in compute_stats_categories(db)],
+    }
+    for key, payload in payloads.items():
+        db.merge(models.BookStats(key=key, payload=payload))
+
+def get_stats_overview(db: Session) -> schemas.StatsOverview:
+    stored = db.get(models.BookStats, "overview")
+    if stored is None:
+        return compute_stats_overview(db)
+    return schemas.StatsOverview.model_validate(stored.payload)
+
+def get_stats_categories(db: Session) -> List[schemas.CategoryStats]:
+    stored = db.get(models.BookStats, "categories")
+    if stored is None:
+        return compute_stats_categories(db)
+    return [schemas.CategoryStats.model_validate(c) for c in stored.payload]
+
+def get_dataset_version(db: Session) -> int:
+    version = db.query(models.DatasetVersion.version).filter(models.DatasetVersion.id == 1).scalar()
+    return version or 0
+
+def bump_dataset_version(db: Session) -> int:
+    """Increments the dataset version in the caller's transaction."""
+    row = db.get(models.DatasetVersion, 1, with_for_update=True)
+    if row is None:
+        row = models.DatasetVersion(id=1, version=0)
+        db.add(row)
+    row.version += 1
+    db.flush()
+    return row.version
+
 def get_top_rated_books(db: Session, limit: int = 10):
-    return db.query(models.Book).order_by(desc(models.Book.rating)).limit(limit).all()
+    return db.query(models.Book).order_by(desc(models.Book.rating), models.Book.id).limit(limit).all()
 
 def get_books_by_price_range(db: Session, min_price: float, max_price: float, limit: int = 100):
     return db.query(models.Book).filter(
@@ -98,26 +164,59 @@ def create_user(db:Session, user: schemas.UserCreate):
 
 #------------------------------------------------------------------------------------------------------#
 
-def get_ml_features(db: Session, limit: int = 1000) -> List[schemas.MLFeatures]:
-    """Returns formatted data for features."""
-    books = db.query(models.Book).filter(
+def get_load_job(db: Session, job_id: int):
+    return db.query(models.LoadJob).filter(models.LoadJob.id == job_id).first()
+
+def enqueue_load_job(db: Session, overwrite: bool, upsert: bool, requested_by: str):
+    """Queues a load job, or returns the one already waiting (flagged as deduplicated).
+
+    Only one job waits at a time, so the waiting job may carry other flags;
+    the caller decides what to do with such a conflicting request.
+    """
+    job = models.LoadJob(
+        status="queued",
+        lock_key="queued",
+        overwrite=overwrite,
+        upsert=upsert,
+        requested_by=requested_by
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        queued = db.query(models.LoadJob).filter(models.LoadJob.lock_key == "queued").first()
+        if queued is None:
+            # The queued job was claimed in between; try again.
+            return enqueue_load_job(db, overwrite, upsert, requested_by)
+        return queued, True
+    db.refresh(job)
+    return job, False
+
+#------------------------------------------------------------------------------------------------------#
+
+def ml_features_query():
+    """Columns of schemas.MLFeatures for every book with a price and rating."""
+    return select(
+        models.Book.id.label("book_id"),
+        models.Book.price,
+        models.Book.rating,
+        models.Book.availability,
+        models.Category.name.label("category")
+    ).select_from(models.Book).outerjoin(models.Category).where(
         models.Book.price.isnot(None),
         models.Book.rating.isnot(None)
-    ).limit(limit).all()
-
-    features = [
-        schemas.MLFeatures(
-            book_id = b.id,
-            price= b.price,
-            rating= b.rating,
-            availability= b.availability,
-            category= b.category
-        ) for b in books
+    )
+
+def get_ml_features(db: Session, limit: int = 1000) -> List[schemas.MLFeatures]:
+    """Returns formatted data for features."""
+    return [
+        schemas.MLFeatures(**row._asdict())
+        for row in db.execute(ml_features_query().order_by(models.Book.id).limit(limit))
     ]
-    return features
 
 
 def get_ml_training_data(db: Session, limit: int = 1000):
     """Returns raw data for ML training."""
-    return db.query(models.Book).limit(limit).all()
+    return get_book_rows(db, limit=limit)
 
@@ -0,0 +1,99 @@
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+
+from api import models, schemas, search, search_index, snapshot
+from api.crud import book_rows_query, categories_query, category_stats_query
+
+
+# Async counterparts of the read functions in api.crud, used by the public
+# read routers. Writes, users and the loader stay on the sync session.
+
+async def get_book_id(db: AsyncSession, book_id: int):
+    return await db.get(models.Book, book_id)
+
+async def get_book_rows(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[dict]:
+    query = book_rows_query().order_by(models.Book.id)
+    if after_id is not None:
+        query = query.where(models.Book.id > after_id)
+    else:
+        query = query.offset(skip)
+    return [row._asdict() for row in await db.execute(query.limit(limit))]
+
+async def search_books(db: AsyncSession, title: Optional[str], category: Optional[str], limit: int = 100,
+                       after: Optional[Tuple[float, int]] = None):
+    """Ranked full-text search; returns (book, rank) pairs, see api.search."""
+    if search_index.SEARCH_BACKEND == "memory":
+        index = await search_index.get_index_async(db)
+        return index.search(title, category, limit=limit, after=after)
+    query = search.search_query(db.bind.dialect.name, title, category, limit, after)
+    return (await db.execute(query)).all() if query is not None else []
+
+async def get_categories(db: AsyncSession):
+    return (await db.execute(categories_query)).scalars().all()
+
+#------------------------------------------------------------------------------------------------------#
+
+async def compute_stats_overview(db: AsyncSession) -> schemas.StatsOverview:
+    total_books = await db.scalar(select(func.count(models.Book.id)))
+    avg_price = await db.scalar(select(func.avg(models.Book.price)))
+
+    rating_dist_query = await db.execute(
+        select(models.Book.rating, func.count(models.Book.rating).label('count'))
+        .group_by(models.Book.rating).order_by(models.Book.rating)
+    )
+    rating_distribution = [
+        schemas.RatingDistribution(rating=r.rating, count=r.count)
+        for r in rating_dist_query if r.rating is not None
+    ]
+    return schemas.StatsOverview(
+        total_books=total_books,
+        average_price=round(avg_price, 2) if avg_price else 0.0,
+        rating_distribution=rating_distribution
+    )
+
+async def compute_stats_categories(db: AsyncSession) -> List[schemas.CategoryStats]:
+    query_result = await db.execute(category_stats_query())
+    return [
+        schemas.CategoryStats(
+            category=r.category,
+            book_count=r.book_count,
+            average_price=round(r.average_price, 2) if r.average_price else None
+        ) for r in query_result
+    ]
+
+async def get_stats_overview(db: AsyncSession, version: Optional[int] = None) -> schemas.StatsOverview:
+    if snapshot.ANALYTICS_BACKEND == "memory":
+        return (await snapshot.get_snapshot_async(db, version)).stats_overview()
+    stored = await db.get(models.BookStats, "overview")
+    if stored is None:
+        return await compute_stats_overview(db)
+    return schemas.StatsOverview.model_validate(stored.payload)
+
+async def get_stats_categories(db: AsyncSession, version: Optional[int] = None) -> List[schemas.CategoryStats]:
+    if snapshot.ANALYTICS_BACKEND == "memory":
+        return (await snapshot.get_snapshot_async(db, version)).stats_categories()
+    stored = await db.get(models.BookStats, "categories")
+    if stored is None:
+        return await compute_stats_categories(db)
+    return [schemas.CategoryStats.model_validate(c) for c in stored.payload]
+
+async def get_dataset_version(db: AsyncSession) -> int:
+    version = await db.scalar(select(models.DatasetVersion.version).where(models.DatasetVersion.id == 1))
+    return version or 0
+
+async def get_top_rated_books(db: AsyncSession, limit: int = 10, version: Optional[int] = None):
+    if snapshot.ANALYTICS_BACKEND == "memory":
+        return (await snapshot.get_snapshot_async(db, version)).top_rated(limit)
+    result = await db.execute(select(models.Book).order_by(desc(models.Book.rating), models.Book.id).limit(limit))
+    return result.scalars().all()
+
+async def get_books_by_price_range(db: AsyncSession, min_price: float, max_price: float, limit: int = 100,
+                                   version: Optional[int] = None):
+    if snapshot.ANALYTICS_BACKEND == "memory":
+        return (await snapshot.get_snapshot_async(db, version)).price_range(min_price, max_price, limit)
+    result = await db.execute(
+        select(models.Book).where(models.Book.price.between(min_price, max_price))
+        .order_by(models.Book.price).limit(limit)
+    )
+    return result.scalars().all()
@@ -1,16 +1,73 @@
+import asyncio
+import logging
 import os
-from sqlalchemy import create_engine
+import time
+from prometheus_client import Histogram
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./local.db")
 
+# Per-process pool settings; every gunicorn worker gets its own pools.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", 2))
+
+pool_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection.",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+
+
+class _TimedPool:
+    label = ""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.labels(engine=self.label).observe(time.perf_counter() - started)
+
+_timed_pools = {}
+
+def timed_pool(base, label: str):
+    """`base` pool class whose checkouts feed db_pool_checkout_wait_seconds{engine=label}."""
+    if (base, label) not in _timed_pools:
+        _timed_pools[base, label] = type(f"Timed{base.__name__}", (_TimedPool, base), {"label": label})
+    return _timed_pools[base, label]
 
-engine_args = {}
+def pool_args(url, label: str, is_async: bool = False) -> dict:
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": timed_pool(AsyncAdaptedQueuePool if is_async else QueuePool, label),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+engine_args = pool_args(DATABASE_URL, "sync")
 if DATABASE_URL.startswith("sqlite"):
     engine_args["connect_args"] = {"check_same_thread": False}
 
@@ -20,9 +77,85 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def async_url(url: str):
+    """Maps DATABASE_URL to its async driver: asyncpg for Postgres, aiosqlite for SQLite."""
+    url = make_url(url.replace("postgres://", "postgresql://", 1))
+    connect_args = {}
+    if url.get_backend_name() == "postgresql":
+        # asyncpg takes `ssl` instead of libpq's sslmode.
+        sslmode = url.query.get("sslmode")
+        if sslmode:
+            url = url.difference_update_query(["sslmode"])
+            connect_args["ssl"] = sslmode
+        url = url.set(drivername="postgresql+asyncpg")
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url, connect_args
+
+
+ASYNC_DATABASE_URL, async_connect_args = async_url(DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, connect_args=async_connect_args, **pool_args(ASYNC_DATABASE_URL, "async", is_async=True)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+monitored_engines = {"sync": engine, "async": async_engine.sync_engine}
+
+
+class PoolCollector:
+    """Exports the current state of every monitored engine's pool on /metrics."""
+
+    def collect(self):
+        gauges = {
+            "size": GaugeMetricFamily("db_pool_size", "Configured pool size.", labels=["engine"]),
+            "checkedout": GaugeMetricFamily("db_pool_checked_out", "Connections in use.", labels=["engine"]),
+            "checkedin": GaugeMetricFamily("db_pool_checked_in", "Idle connections in the pool.", labels=["engine"]),
+            "overflow": GaugeMetricFamily("db_pool_overflow", "Connections opened beyond pool_size.", labels=["engine"]),
+        }
+        for label, monitored in monitored_engines.items():
+            pool = monitored.pool
+            if not isinstance(pool, QueuePool):
+                continue
+            for name, gauge in gauges.items():
+                value = getattr(pool, name)()
+                # QueuePool counts overflow from -pool_size until the pool has filled up.
+                gauge.add_metric([label], max(value, 0) if name == "overflow" else value)
+        yield from gauges.values()
+
+REGISTRY.register(PoolCollector())
+
+
+async def warm_up(connections: int = DB_WARMUP_CONNECTIONS):
+    """Opens `connections` pooled connections per engine so first requests skip the connect."""
+    if connections <= 0:
+        return
+    started = time.perf_counter()
+
+    async def touch(conn):
+        await conn.execute(text("SELECT 1"))
+        await conn.close()
+
+    conns = await asyncio.gather(*(async_engine.connect() for _ in range(connections)))
+    await asyncio.gather(*(touch(conn) for conn in conns))
+
+    def warm_sync():
+        conns = [engine.connect() for _ in range(connections)]
+        for conn in conns:
+            conn.execute(text("SELECT 1"))
+            conn.close()
+
+    await asyncio.to_thread(warm_sync)
+    logger.info(f"Warmed up {connections} database connection(s) per engine in {time.perf_counter() - started:.2f}s.")
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()  
\ No newline at end of file
+        db.close()  
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
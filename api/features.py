@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from api import crud, models
+
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# One sub-directory per dataset version holding these files.
+FEATURES_DIR = os.getenv("FEATURES_DIR", os.path.join(BASE_DIR, "data", "features"))
+FILES = ("matrix.npy", "book_ids.npy", "raw.npy", "schema.json")
+# Price buckets split at these quantiles of the current prices.
+PRICE_BUCKET_QUANTILES = (0.25, 0.5, 0.75)
+KEEP_VERSIONS = 2
+# The unencoded values behind /ml/features, one record per matrix row.
+RAW_DTYPE = np.dtype([("price", "f8"), ("rating", "i2"), ("availability", "i4"), ("category_code", "i4")])
+
+
+class FeatureMatrix:
+    """A persisted feature matrix, memory-mapped read-only."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "schema.json")) as f:
+            self.schema = json.load(f)
+        self.version = self.schema["version"]
+        self.matrix = np.load(os.path.join(path, "matrix.npy"), mmap_mode="r")
+        self.book_ids = np.load(os.path.join(path, "book_ids.npy"), mmap_mode="r")
+        self.raw = np.load(os.path.join(path, "raw.npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.book_ids)
+
+    def file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def records(self, limit: int = 1000, offset: int = 0) -> list[dict]:
+        """Rows as schemas.MLFeatures dicts, in book id order."""
+        window = slice(max(offset, 0), max(offset, 0) + max(limit, 0))
+        raw = self.raw[window]
+        categories = self.schema["categories"]
+        return [
+            {"book_id": book_id, "price": price, "rating": rating, "availability": availability,
+             "category": categories[code] if code >= 0 else None}
+            for book_id, price, rating, availability, code in zip(
+                self.book_ids[window].tolist(), raw["price"].tolist(), raw["rating"].tolist(),
+                raw["availability"].tolist(), raw["category_code"].tolist()
+            )
+        ]
+
+
+def _standardize(values: np.ndarray) -> tuple[np.ndarray, dict]:
+    mean = float(values.mean()) if len(values) else 0.0
+    std = float(values.std()) if len(values) else 0.0
+    return (values - mean) / (std or 1.0), {"mean": mean, "std": std}
+
+def compute(db: Session, version: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, dict]:
+    """Encodes every book with a price and rating; returns (matrix, book_ids, raw, schema)."""
+    rows = db.execute(crud.ml_features_query().order_by(models.Book.id)).all()
+    book_ids = np.array([r.book_id for r in rows], dtype=np.int64)
+    price = np.array([r.price for r in rows], dtype=np.float64)
+    rating = np.array([r.rating for r in rows], dtype=np.float64)
+    availability = np.array([r.availability or 0 for r in rows], dtype=np.float64)
+
+    names, codes = np.unique(np.array([r.category or "" for r in rows], dtype=object), return_inverse=True)
+    codes = codes.astype(np.int64)
+    if len(names) and names[0] == "":
+        # Books without a category: code -1 and no one-hot bit set.
+        names, codes = names[1:], codes - 1
+    one_hot = np.zeros((len(rows), len(names)), dtype=np.float32)
+    categorized = codes >= 0
+    one_hot[np.flatnonzero(categorized), codes[categorized]] = 1.0
+
+    edges = np.quantile(price, PRICE_BUCKET_QUANTILES) if len(rows) else np.zeros(len(PRICE_BUCKET_QUANTILES))
+    price_bucket = np.searchsorted(edges, price, side="right")
+    price_z, price_stats = _standardize(price)
+    availability_z, availability_stats = _standardize(availability)
+
+    columns = [
+        ("price", "numeric", price),
+        ("price_z", "standardized", price_z),
+        ("price_bucket", "ordinal", price_bucket),
+        ("rating", "ordinal", rating),
+        ("availability", "numeric", availability),
+        ("availability_z", "standardized", availability_z),
+        ("category_code", "ordinal", codes),
+    ]
+    matrix = np.empty((len(rows), len(columns) + len(names)), dtype=np.float32)
+    for i, (_, _, values) in enumerate(columns):
+        matrix[:, i] = values
+    matrix[:, len(columns):] = one_hot
+
+    raw = np.empty(len(rows), dtype=RAW_DTYPE)
+    raw["price"], raw["rating"], raw["availability"], raw["category_code"] = price, rating, availability, codes
+
+    schema = {
+        "version": version,
+        "rows": len(rows),
+        "dtype": "float32",
+        "columns": [{"name": name, "kind": kind} for name, kind, _ in columns]
+                   + [{"name": f"category={name}", "kind": "one_hot"} for name in names],
+        "normalization": {"price": price_stats, "availability": availability_stats},
+        "price_bucket_edges": [float(e) for e in edges],
+        "categories": [str(name) for name in names],
+        "built_at": datetime.now(timezone.utc).isoformat(),
+    }
+    return matrix, book_ids, raw, schema
+
+
+def version_path(version: int) -> str:
+    return os.path.join(FEATURES_DIR, f"v{version}")
+
+def is_complete(path: str) -> bool:
+    return all(os.path.exists(os.path.join(path, name)) for name in FILES)
+
+def write(db: Session, version: Optional[int] = None) -> str:
+    """Computes and persists the feature matrix of `version` (default: the current dataset version).
+
+    Files are written to a temporary directory and renamed into place, so
+    readers never see a partial version; a directory left incomplete (e.g. by
+    an older layout) is replaced, and older versions beyond KEEP_VERSIONS
+    are removed.
+    """
+    started = time.perf_counter()
+    if version is None:
+        version = crud.get_dataset_version(db)
+    matrix, book_ids, raw, schema = compute(db, version)
+
+    os.makedirs(FEATURES_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".building-", dir=FEATURES_DIR)
+    np.save(os.path.join(tmp, "matrix.npy"), matrix)
+    np.save(os.path.join(tmp, "book_ids.npy"), book_ids)
+    np.save(os.path.join(tmp, "raw.npy"), raw)
+    with open(os.path.join(tmp, "schema.json"), "w") as f:
+        json.dump(schema, f)
+    path = version_path(version)
+    if os.path.exists(path) and not is_complete(path):
+        shutil.rmtree(path)
+    try:
+        os.rename(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        # Fine only if another process persisted this version first.
+        if not is_complete(path):
+            raise
+    logger.info(f"Wrote feature matrix v{version} ({matrix.shape[0]}x{matrix.shape[1]}) "
+                f"in {time.perf_counter() - started:.2f}s.")
+
+    others = sorted(
+        (int(name[1:]) for name in os.listdir(FEATURES_DIR)
+         if name.startswith("v") and name[1:].isdigit() and int(name[1:]) != version),
+        reverse=True
+    )
+    for old in others[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(version_path(old), ignore_errors=True)
+    return path
+
+
+_matrix: Optional[FeatureMatrix] = None
+_lock = threading.Lock()
+
+def get_matrix(db: Session) -> FeatureMatrix:
+    """The feature matrix of the current dataset version, loaded once per process.
+
+    The loader persists it after each load; if this version isn't on disk
+    yet (e.g. the worker runs on another machine), it is built here first.
+    """
+    global _matrix
+    version = crud.get_dataset_version(db)
+    if _matrix is not None and _matrix.version == version:
+        return _matrix
+    with _lock:
+        if _matrix is None or _matrix.version != version:
+            path = version_path(version)
+            if not is_complete(path):
+                write(db, version)
+            _matrix = FeatureMatrix(path)
+        return _matrix
@@ -1,8 +1,36 @@
+import logging
 from fastapi import FastAPI
 from api.routers import health, books, stats, auth, ml
+from api import search_index, snapshot
+from api.database import AsyncSessionLocal, async_engine, warm_up
 from contextlib import asynccontextmanager
 from prometheus_fastapi_instrumentator import Instrumentator
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await warm_up()
+    except Exception as e:
+        logger.warning(f"Database warm-up failed, connections will be opened on demand: {e}")
+    if search_index.SEARCH_BACKEND == "memory":
+        # Build the search index up front so the first search doesn't pay for it.
+        try:
+            async with AsyncSessionLocal() as db:
+                await search_index.get_index_async(db)
+        except Exception as e:
+            logger.warning(f"Could not build the search index at startup, it will be built on first use: {e}")
+    if snapshot.ANALYTICS_BACKEND == "memory":
+        try:
+            async with AsyncSessionLocal() as db:
+                await snapshot.get_snapshot_async(db)
+        except Exception as e:
+            logger.warning(f"Could not build the catalog snapshot at startup, it will be built on first use: {e}")
+    yield
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="Public Book API - Tech Challenge",
@@ -12,6 +40,7 @@ app = FastAPI(
     "url":"https://github.com/douglas-varjao",
     "email":"study.viniciusvarjao@gmail.com",
     },
+    lifespan=lifespan,
 )
 
 Instrumentator().instrument(app).expose(app)
@@ -1,8 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, JSON, Index, ForeignKey, select
+from sqlalchemy.orm import column_property
 from sqlalchemy.sql import func
 from api.database import Base
 
 
+class Category(Base):
+    __tablename__ = "categories"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+
 class Book(Base):
     __tablename__ = "books"
 
@@ -10,12 +18,45 @@ class Book(Base):
     title = Column(String, index=True)
     price = Column(Float)
     rating = Column(Integer)
-    availability = Column(String)
-    category = Column(String, index=True)
+    availability = Column(Integer)
+    category_id = Column(Integer, ForeignKey("categories.id"), index=True)
     image_url = Column(String)
     product_url = Column(String, unique=True, index=True)
+    upc = Column(String)
+    description = Column(Text)
+    num_reviews = Column(Integer)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Read-only category name, so books still serialize with their category.
+    category = column_property(
+        select(Category.name).where(Category.id == category_id).correlate_except(Category).scalar_subquery()
+    )
+
+
+# Serve top-rated (rating desc, id tiebreak), price-range and per-category
+# price stats from index order instead of sorting the whole table.
+Index("ix_books_rating_desc_id", Book.rating.desc(), Book.id)
+Index("ix_books_price", Book.price)
+Index("ix_books_category_id_price", Book.category_id, Book.price)
+
+
+class BookStats(Base):
+    """Precomputed /stats payloads, refreshed at the end of every load."""
+    __tablename__ = "book_stats"
+
+    key = Column(String, primary_key=True)
+    payload = Column(JSON, nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class DatasetVersion(Base):
+    """Single row counting the loads that changed books; cache keys embed it."""
+    __tablename__ = "dataset_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 
 class User(Base):
     __tablename__ = "users"
@@ -26,3 +67,26 @@ class User(Base):
     hashed_password = Column(String)
     is_admin = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class LoadJob(Base):
+    __tablename__ = "load_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, index=True, default="queued")
+    # "queued" or "running" while the job is active, NULL once it finishes; being
+    # unique, it lets the database dedupe triggers and allow a single running load.
+    lock_key = Column(String, unique=True, nullable=True)
+    overwrite = Column(Boolean, default=False)
+    upsert = Column(Boolean, default=False)
+    requested_by = Column(String)
+    worker = Column(String)
+    stage = Column(String)
+    rows_processed = Column(Integer, default=0)
+    stage_timings = Column(JSON)
+    result = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    heartbeat_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
@@ -0,0 +1,50 @@
+import base64
+import json
+from typing import Optional
+
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque cursor pointing just after the book with `last_id`."""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Returns the id encoded in a cursor, raising ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(raw)["id"]
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(last_id, int):
+        raise ValueError("Invalid cursor")
+    return last_id
+
+
+def encode_rank_cursor(rank: float, last_id: int) -> str:
+    """Cursor for relevance-ordered results: the (rank, id) of the last item."""
+    raw = json.dumps({"rank": rank, "id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        rank, last_id = float(raw["rank"]), raw["id"]
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(last_id, int):
+        raise ValueError("Invalid cursor")
+    return rank, last_id
+
+
+def next_link(url, cursor: Optional[str]) -> Optional[str]:
+    """Builds the RFC 8288 Link header for the next page, if there is one.
+
+    The target is relative (path and query only), so a cached response
+    stays valid whichever host it is served through.
+    """
+    if cursor is None:
+        return None
+    next_url = url.remove_query_params("skip").include_query_params(cursor=cursor)
+    return f'<{next_url.path}?{next_url.query}>; rel="next"'
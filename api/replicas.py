@@ -0,0 +1,156 @@
+import itertools
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from prometheus_client import Counter
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from api.database import (
+    AsyncSessionLocal, SessionLocal, async_engine, async_url, engine, monitored_engines, pool_args
+)
+
+
+logger = logging.getLogger(__name__)
+
+DATABASE_READ_URLS = [u.strip() for u in os.getenv("DATABASE_READ_URLS", "").split(",") if u.strip()]
+# "round_robin" or "least_busy" (fewest checked-out connections).
+DB_READ_STRATEGY = os.getenv("DB_READ_STRATEGY", "round_robin")
+# How often replica dataset versions are compared with the primary's.
+REPLICA_CHECK_SECONDS = float(os.getenv("REPLICA_CHECK_SECONDS", 2))
+
+read_routes = Counter(
+    "db_read_routed_total",
+    "Read sessions handed out, by target database.",
+    ["target"],
+)
+
+_VERSION_SQL = text("SELECT version FROM dataset_version WHERE id = 1")
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+        self.engine = create_engine(url, connect_args=connect_args, **pool_args(url, name))
+        read_url, async_connect_args = async_url(url)
+        self.async_engine = create_async_engine(
+            read_url, connect_args=async_connect_args, **pool_args(read_url, f"{name}_async", is_async=True)
+        )
+        # Last dataset version seen on the replica; None while unreachable.
+        self.version: Optional[int] = None
+
+
+class ReplicaRouter:
+    """Picks the database a read-only session binds to.
+
+    A replica is only eligible once its dataset version has caught up with
+    the primary's, so right after a reload reads stay on the primary until
+    the replica has replayed the new data; with no eligible replica, reads
+    go to the primary.
+    """
+
+    def __init__(self, urls: list[str], strategy: str = DB_READ_STRATEGY):
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls)]
+        self.strategy = strategy
+        self.turn = itertools.count()
+        self.primary_version = 0
+        self.checked_at: Optional[float] = None
+        for replica in self.replicas:
+            monitored_engines[replica.name] = replica.engine
+            monitored_engines[f"{replica.name}_async"] = replica.async_engine.sync_engine
+
+    def _needs_check(self) -> bool:
+        return self.checked_at is None or time.monotonic() - self.checked_at >= REPLICA_CHECK_SECONDS
+
+    def _eligible(self) -> list[Replica]:
+        return [r for r in self.replicas if r.version is not None and r.version >= self.primary_version]
+
+    def _choose(self, replicas: list[Replica], is_async: bool) -> Optional[Replica]:
+        if not replicas:
+            return None
+        if self.strategy == "least_busy":
+            def busy(replica):
+                pool = (replica.async_engine.sync_engine if is_async else replica.engine).pool
+                return pool.checkedout() if hasattr(pool, "checkedout") else 0
+            return min(replicas, key=busy)
+        return replicas[next(self.turn) % len(replicas)]
+
+    def _log_lag(self):
+        lagging = [r.name for r in self.replicas if r.version is None or r.version < self.primary_version]
+        if lagging:
+            logger.info(f"Replicas behind primary version {self.primary_version}: {', '.join(lagging)}")
+
+    def refresh(self):
+        self.checked_at = time.monotonic()
+        try:
+            with engine.connect() as conn:
+                self.primary_version = conn.execute(_VERSION_SQL).scalar() or 0
+        except Exception as e:
+            logger.warning(f"Could not read the primary's dataset version: {e}")
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    replica.version = conn.execute(_VERSION_SQL).scalar() or 0
+            except Exception as e:
+                logger.warning(f"Read replica {replica.name} unavailable: {e}")
+                replica.version = None
+        self._log_lag()
+
+    async def refresh_async(self):
+        # Set up front so concurrent requests don't all start a check.
+        self.checked_at = time.monotonic()
+        try:
+            async with async_engine.connect() as conn:
+                self.primary_version = (await conn.execute(_VERSION_SQL)).scalar() or 0
+        except Exception as e:
+            logger.warning(f"Could not read the primary's dataset version: {e}")
+        for replica in self.replicas:
+            try:
+                async with replica.async_engine.connect() as conn:
+                    replica.version = (await conn.execute(_VERSION_SQL)).scalar() or 0
+            except Exception as e:
+                logger.warning(f"Read replica {replica.name} unavailable: {e}")
+                replica.version = None
+        self._log_lag()
+
+    def pick(self) -> Optional[Replica]:
+        if self._needs_check():
+            self.refresh()
+        return self._choose(self._eligible(), is_async=False)
+
+    async def pick_async(self) -> Optional[Replica]:
+        if self._needs_check():
+            await self.refresh_async()
+        return self._choose(self._eligible(), is_async=True)
+
+
+read_router = ReplicaRouter(DATABASE_READ_URLS) if DATABASE_READ_URLS else None
+
+
+def get_read_db():
+    """Like get_db, but bound to an up-to-date read replica when DATABASE_READ_URLS is set."""
+    replica = read_router.pick() if read_router else None
+    read_routes.labels(target=replica.name if replica else "primary").inc()
+    db = SessionLocal(bind=replica.engine) if replica else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def async_read_session():
+    """Async read session on an up-to-date replica, or the primary."""
+    replica = await read_router.pick_async() if read_router else None
+    read_routes.labels(target=replica.name if replica else "primary").inc()
+    bind = replica.async_engine if replica else async_engine
+    async with AsyncSessionLocal(bind=bind) as db:
+        yield db
+
+async def get_async_read_db():
+    async with async_read_session() as db:
+        yield db
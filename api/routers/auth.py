@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
@@ -12,8 +12,6 @@ from api.security import(
     get_current_admin_user
 )
 
-from scripts.load_to_db import populate_database
-
 router = APIRouter(
     prefix="/api/v1",
     tags=["Autentication & Admin (Bonus)"]
@@ -41,19 +39,45 @@ def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-@router.post("/scraping/trigger", status_code=status.HTTP_202_ACCEPTED)
+@router.post("/scraping/trigger", response_model=schemas.LoadJobQueued, status_code=status.HTTP_202_ACCEPTED)
 def trigger_data_load(
-    background_tasks: BackgroundTasks,
+    request: Request,
     overwrite: bool = False,
+    upsert: bool = False,
+    db: Session = Depends(get_db),
     current_admin: models.User = Depends(get_current_admin_user)
 ):
-    """[ADMIN] Triggers the loading of data from 'books.csv' into the database.
-Runs in the background to avoid blocking the API."""
-    background_tasks.add_task(populate_database, overwrite=overwrite)
+    """[ADMIN] Queues the loading of data from 'books.csv' into the database.
+The load runs in the worker process (scripts/worker.py), one at a time. With 'upsert', only new or changed books are written.
+If the same load is already waiting in the queue, that job is returned instead of queueing another;
+a load with other flags waiting in the queue is a conflict (409)."""
+    job, deduplicated = crud.enqueue_load_job(db, overwrite=overwrite, upsert=upsert, requested_by=current_admin.username)
+    if deduplicated and (job.overwrite, job.upsert) != (overwrite, upsert):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Load job {job.id} is already queued with overwrite={job.overwrite}, upsert={job.upsert}; "
+                   f"retry once it has started"
+        )
+
+    return {"job_id": job.id,
+            "status": job.status,
+            "status_url": str(request.url_for("get_load_job", job_id=job.id)),
+            "deduplicated": deduplicated,
+            "overwrite": job.overwrite,
+            "upsert": job.upsert}
 
-    return{"message": "Data loading process initiated in the background.",
-           "admin_user": current_admin.username,
-           "overwrite": overwrite}
+
+@router.get("/scraping/jobs/{job_id}", response_model=schemas.LoadJob)
+def get_load_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin_user)
+):
+    """[ADMIN] Returns the status, progress and per-stage timings (seconds) of a load job."""
+    job = crud.get_load_job(db, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Load job not found")
+    return job
 
 
 @router.post("/auth/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
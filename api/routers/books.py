@@ -1,29 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from pydantic import TypeAdapter
 
-from api import crud, models, schemas
-from api.database import get_db
+from api import crud_async, models, schemas
+from api.cache import cached_response
+from api.replicas import get_async_read_db
+from api.pagination import decode_cursor, decode_rank_cursor, encode_cursor, encode_rank_cursor, next_link
 
 router = APIRouter(
     prefix="/api/v1",
     tags=["Books (Core)"]
 )
 
+categories_adapter = TypeAdapter(List[str])
+
 @router.get("/books", response_model=List[schemas.Book])
-def read_books(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """List all books avaliable in th database(paginated)"""
-    books = crud.get_books(db, skip=skip, limit=limit)
-    return books
+async def read_books(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page (replaces 'skip')"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """List all books avaliable in th database(paginated), ordered by id.
+When the page is full, the next page is given by the 'X-Next-Cursor' and 'Link' headers."""
+    after_id = None
+    if cursor:
+        try:
+            after_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
 
-@router.get("/books/search", response_model=List[schemas.Book])
-def search_books(
+    def page_headers(books):
+        if not books or len(books) < limit:
+            return {}
+        next_cursor = encode_cursor(books[-1]["id"])
+        return {"X-Next-Cursor": next_cursor, "Link": next_link(request.url, next_cursor)}
+
+    return await cached_response(
+        request, db, "books", None,
+        lambda version: crud_async.get_book_rows(db, skip=skip, limit=limit, after_id=after_id),
+        headers=page_headers
+    )
 
-    title: Optional[str] = Query(None, description="Search by title (partial)"),
-    category: Optional[str] = Query(None, description="Search by category (partial)"),
-    db: Session = Depends(get_db)
+@router.get("/books/search", response_model=List[schemas.Book])
+async def search_books(
+    request: Request,
+    response: Response,
+    title: Optional[str] = Query(None, description="Search by title (words or word prefixes)"),
+    category: Optional[str] = Query(None, description="Search by category (words or word prefixes)"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Search for books by title and/or category."""
+    """Search for books by title and/or category, most relevant first.
+When the page is full, the next page is given by the 'X-Next-Cursor' and 'Link' headers."""
     
     if title == "":
         title = None
@@ -47,15 +79,28 @@ def search_books(
             detail="The 'category' must have at least 3 characters."
         )
         
-    books = crud.search_books(db, title=title, category=category)
-    if not books:
+    after = None
+    if cursor:
+        try:
+            after = decode_rank_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    results = await crud_async.search_books(db, title=title, category=category, limit=limit, after=after)
+    if not results and after is None:
         raise HTTPException(status_code=404, detail="No books were found that matched these criteria.")
-    return books
+
+    if len(results) == limit:
+        last_book, last_rank = results[-1]
+        next_cursor = encode_rank_cursor(last_rank, last_book.id)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = next_link(request.url, next_cursor)
+    return [book for book, _ in results]
 
 @router.get("/books/{book_id}", response_model=schemas.Book)
-def read_book(book_id: int, db: Session = Depends(get_db)):
+async def read_book(book_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Get a specific book by its ID"""
-    db_book = crud.get_book_id(db, book_id=book_id)
+    db_book = await crud_async.get_book_id(db, book_id=book_id)
     if db_book is None:
         raise HTTPException(status_code=404, detail="Book not found")
     return db_book
@@ -63,7 +108,6 @@ def read_book(book_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/categories", response_model=List[str])
-def get_categories(db: Session = Depends(get_db)):
+async def get_categories(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     """List all unique book categories"""
-    categories = crud.get_categories(db)
-    return categories
\ No newline at end of file
+    return await cached_response(request, db, "categories", categories_adapter, lambda version: crud_async.get_categories(db))
\ No newline at end of file
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from api import schemas
-from api.database import get_db
+from api.database import get_async_db
 import logging
 
 router = APIRouter(
@@ -12,10 +12,10 @@ router = APIRouter(
 
 
 @router.get("", response_model=schemas.HealthCheck)
-def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     """health check endpoint to verify API is running"""
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         db_status = "Connected"
     except Exception as e:
         logging.error(f"Health check: Database connection failed: {e}")
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal
+import numpy as np
 import random
 
-from api import schemas, models, crud
-from api.database import get_db
+from api import schemas, models, crud, export, features
+from api.replicas import get_read_db
+from api.serialization import FastJSONResponse
 from api.security import get_current_admin_user
 
 router = APIRouter(
@@ -15,15 +18,58 @@ router = APIRouter(
 
 
 @router.get("/features", response_model=List[schemas.MLFeatures])
-def get_ml_features(limit: int = 1000, db: Session = Depends(get_db)):
-    """[AUTH] Returns data formatted as 'features' for ML models."""
-    return crud.get_ml_features(db, limit=limit)
+def get_ml_features(limit: int = 1000, db: Session = Depends(get_read_db)):
+    """[AUTH] Returns data formatted as 'features' for ML models, read from the persisted feature matrix."""
+    return FastJSONResponse(features.get_matrix(db).records(limit))
+
+
+@router.get("/features/schema", response_model=schemas.MLFeatureSchema)
+def get_ml_feature_schema(db: Session = Depends(get_read_db)):
+    """[AUTH] Describes the encoded feature matrix of the current dataset version."""
+    return FastJSONResponse(features.get_matrix(db).schema)
+
+
+@router.get("/features/matrix", response_model=schemas.MLFeatureMatrix)
+def get_ml_feature_matrix(offset: int = 0, limit: int = 1000, db: Session = Depends(get_read_db)):
+    """[AUTH] Rows of the encoded feature matrix, computed once per dataset load (see /features/schema)."""
+    matrix = features.get_matrix(db)
+    window = slice(max(offset, 0), max(offset, 0) + max(limit, 0))
+    return FastJSONResponse({
+        "version": matrix.version,
+        "columns": [column["name"] for column in matrix.schema["columns"]],
+        "book_ids": np.asarray(matrix.book_ids[window]),
+        "rows": np.asarray(matrix.matrix[window]),
+    }, headers={"X-Feature-Version": str(matrix.version)})
+
+
+@router.get("/features/{part}.npy")
+def download_ml_feature_matrix(part: Literal["matrix", "book_ids"], db: Session = Depends(get_read_db)):
+    """[AUTH] The whole persisted matrix (or its row ids) as a NumPy .npy file, for np.load(mmap_mode="r")."""
+    matrix = features.get_matrix(db)
+    return FileResponse(
+        matrix.file(f"{part}.npy"),
+        media_type="application/octet-stream",
+        filename=f"features-v{matrix.version}-{part}.npy",
+        headers={"X-Feature-Version": str(matrix.version)}
+    )
 
 
 @router.get("/training-data", response_model=List[schemas.Book])
-def get_ml_training_data(limit: int = 1000, db: Session = Depends(get_db)):
+def get_ml_training_data(limit: int = 1000, db: Session = Depends(get_read_db)):
     """[AUTH] Returns the 'raw' dataset for model training."""
-    return crud.get_ml_training_data(db, limit=limit)
+    return FastJSONResponse(crud.get_ml_training_data(db, limit=limit))
+
+
+@router.get("/features/export")
+async def export_ml_features(format: Literal["ndjson", "csv", "arrow"] = "ndjson"):
+    """[AUTH] Streams the features of every book, without a limit, as NDJSON, CSV or Arrow IPC."""
+    return export.streaming_response(crud.ml_features_query().order_by(models.Book.id), format, "features")
+
+
+@router.get("/training-data/export")
+async def export_ml_training_data(format: Literal["ndjson", "csv", "arrow"] = "ndjson"):
+    """[AUTH] Streams the full 'raw' dataset, without a limit, as NDJSON, CSV or Arrow IPC."""
+    return export.streaming_response(crud.book_rows_query().order_by(models.Book.id), format, "training-data")
 
 
 @router.post("/predictions", response_model=schemas.MLPredictionResponse)
@@ -1,40 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from pydantic import TypeAdapter
 
-from api import schemas, crud
-from api.database import get_db
+from api import schemas, crud_async
+from api.cache import cached_response
+from api.replicas import get_async_read_db
 
 router = APIRouter(
     prefix="/api/v1",
     tags=["Stats & insights (Optional)"]
 )
 
+overview_adapter = TypeAdapter(schemas.StatsOverview)
+categories_adapter = TypeAdapter(List[schemas.CategoryStats])
+books_adapter = TypeAdapter(List[schemas.Book])
+
 
 @router.get("/stats/overview", response_model=schemas.StatsOverview)
-def get_stats_overview(db: Session = Depends(get_db)):
+async def get_stats_overview(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     """Returns an overview of book statistics including total , average price, and rating distribution."""
-    return crud.get_stats_overview(db)
+    return await cached_response(request, db, "stats_overview", overview_adapter, lambda version: crud_async.get_stats_overview(db, version))
 
 
 @router.get("/stats/categories", response_model=List[schemas.CategoryStats])
-def get_stats_categories(db: Session = Depends(get_db)):
+async def get_stats_categories(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     """Returns statistics for each book category including book count and average price."""
-    return crud.get_stats_categories(db)
+    return await cached_response(request, db, "stats_categories", categories_adapter, lambda version: crud_async.get_stats_categories(db, version))
 
 
 @router.get("/books/top-rated", response_model=List[schemas.Book])
-def get_top_rated_books(limit: int = 10, db: Session = Depends(get_db)):
+async def get_top_rated_books(request: Request, limit: int = 10, db: AsyncSession = Depends(get_async_read_db)):
     """Returns the top-rated books limited by the specified number."""
-    return crud.get_top_rated_books(db, limit=limit)
+    return await cached_response(request, db, "top_rated", books_adapter, lambda version: crud_async.get_top_rated_books(db, limit=limit, version=version))
 
 
 @router.get("/books/price-range", response_model=List[schemas.Book])
-def get_books_by_price_range(
+async def get_books_by_price_range(
+    request: Request,
     min: float = Query(0.0, description="Minimum price"),
     max: float = Query(100.0, description="Maximum price"),
-    db: Session = Depends(get_db)):
+    db: AsyncSession = Depends(get_async_read_db)):
     """Returns books within the specified price range."""
     if min > max:
         raise HTTPException(status_code=400, detail="Minimum price cannot be greater than maximum price.")
-    return crud.get_books_by_price_range(db, min_price=min, max_price=max)
\ No newline at end of file
+    return await cached_response(
+        request, db, "price_range", books_adapter,
+        lambda version: crud_async.get_books_by_price_range(db, min_price=min, max_price=max, version=version)
+    )
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Dict
 
 
 class BookBase(BaseModel):
@@ -8,9 +8,12 @@ class BookBase(BaseModel):
     price: Optional[float] = None
     rating: Optional[int] = None
     availability: Optional[int] = None
-    category: str
+    category: Optional[str] = None
     image_url: Optional[str] = None
     product_url: str
+    upc: Optional[str] = None
+    description: Optional[str] = None
+    num_reviews: Optional[int] = None
 
 
 class BookCreate(BookBase):
@@ -59,6 +62,36 @@ class HealthCheck(BaseModel):
     database: str
 
 
+class LoadJob(BaseModel):
+    id: int
+    status: str
+    overwrite: bool
+    upsert: bool
+    requested_by: Optional[str] = None
+    worker: Optional[str] = None
+    stage: Optional[str] = None
+    rows_processed: int = 0
+    stage_timings: Optional[Dict[str, float]] = None
+    result: Optional[Dict[str, int]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class LoadJobQueued(BaseModel):
+    job_id: int
+    status: str
+    status_url: str
+    deduplicated: bool
+    overwrite: bool
+    upsert: bool
+
+
 class RatingDistribution(BaseModel):
     rating: int
     count: int
@@ -81,7 +114,35 @@ class MLFeatures(BaseModel):
     price: float
     rating: int
     availability: int
-    category: str
+    category: Optional[str] = None
+
+
+class MLFeatureColumn(BaseModel):
+    name: str
+    kind: str
+
+
+class NormalizationStats(BaseModel):
+    mean: float
+    std: float
+
+
+class MLFeatureSchema(BaseModel):
+    version: int
+    rows: int
+    dtype: str
+    columns: List[MLFeatureColumn]
+    normalization: Dict[str, NormalizationStats]
+    price_bucket_edges: List[float]
+    categories: List[str]
+    built_at: datetime
+
+
+class MLFeatureMatrix(BaseModel):
+    version: int
+    columns: List[str]
+    book_ids: List[int]
+    rows: List[List[float]]
 
 
 class MLPredictionRequest(BaseModel):
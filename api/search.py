@@ -0,0 +1,160 @@
+import re
+from typing import Optional
+
+from sqlalchemy import Float, and_, cast, func, literal_column, or_, select, text
+from sqlalchemy.orm import Session
+
+from api import models
+
+
+FTS_TABLE = "books_fts"
+# SQLite: the FTS table indexes this view, which resolves category names.
+FTS_SOURCE = "books_fts_source"
+# Title matches weigh more than category matches in the ranking.
+TITLE_WEIGHT, CATEGORY_WEIGHT = 10.0, 2.0
+
+# Postgres: generated columns can't read other tables, so books carries the
+# title vector and categories the category one; queries concatenate them.
+_SEARCH_COLUMNS = {
+    "books": "setweight(to_tsvector('simple', coalesce(title, '')), 'A')",
+    "categories": "setweight(to_tsvector('simple', coalesce(name, '')), 'B')",
+}
+_CATEGORY_NAME = "(SELECT name FROM categories WHERE id = {row}.category_id)"
+_SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""AFTER INSERT ON books BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, category) VALUES (new.id, new.title, {_CATEGORY_NAME.format(row="new")});
+    END""",
+    f"{FTS_TABLE}_ad": f"""AFTER DELETE ON books BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, category) VALUES ('delete', old.id, old.title, {_CATEGORY_NAME.format(row="old")});
+    END""",
+    f"{FTS_TABLE}_au": f"""AFTER UPDATE ON books BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, category) VALUES ('delete', old.id, old.title, {_CATEGORY_NAME.format(row="old")});
+        INSERT INTO {FTS_TABLE}(rowid, title, category) VALUES (new.id, new.title, {_CATEGORY_NAME.format(row="new")});
+    END""",
+}
+
+
+def add_search_column(conn, table: str = "books"):
+    """Postgres: adds the weighted tsvector generated from the title (or, on categories, the name)."""
+    if conn.dialect.name == "postgresql":
+        source = _SEARCH_COLUMNS["categories" if table == "categories" else "books"]
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({source}) STORED"
+        ))
+
+def create_search_index(conn, table: str = "books"):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING gin (search_vector)"))
+
+def install(conn):
+    """Creates the search index for books if missing (idempotent).
+
+    Postgres keeps GIN-indexed generated columns on books (title) and
+    categories (name, small enough to go without an index); SQLite keeps an
+    external-content FTS5 table over a books/categories view, synced by triggers.
+    """
+    if conn.dialect.name == "postgresql":
+        add_search_column(conn)
+        create_search_index(conn)
+        add_search_column(conn, "categories")
+    elif conn.dialect.name == "sqlite":
+        conn.execute(text(
+            f"CREATE VIEW IF NOT EXISTS {FTS_SOURCE} AS SELECT books.id, books.title, categories.name AS category "
+            f"FROM books LEFT JOIN categories ON categories.id = books.category_id"
+        ))
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE}).first()
+        if not exists:
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, category, content='{FTS_SOURCE}', "
+                f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            ))
+        for name, body in _SQLITE_TRIGGERS.items():
+            conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {body}"))
+        if not exists:
+            rebuild(conn)
+
+def rebuild(conn):
+    """Re-reads every book into the SQLite FTS index, e.g. after books was swapped."""
+    if conn.dialect.name == "sqlite":
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+def uninstall(conn):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("DROP INDEX IF EXISTS ix_books_search_vector"))
+        conn.execute(text("ALTER TABLE books DROP COLUMN IF EXISTS search_vector"))
+        conn.execute(text("ALTER TABLE categories DROP COLUMN IF EXISTS search_vector"))
+    elif conn.dialect.name == "sqlite":
+        for name in _SQLITE_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+        conn.execute(text(f"DROP VIEW IF EXISTS {FTS_SOURCE}"))
+
+
+def terms(value: Optional[str]) -> list[str]:
+    return re.findall(r"\w+", value.lower()) if value else []
+
+def _match(dialect: str, title_terms: list[str], category_terms: list[str]):
+    """Returns (filter, rank) expressions; every term must prefix-match its field."""
+    if dialect == "postgresql":
+        title_query = [f"{t}:*A" for t in title_terms]
+        category_query = [f"{t}:*B" for t in category_terms]
+        title_vector = literal_column("books.search_vector")
+        category_vector = func.coalesce(literal_column("categories.search_vector"), literal_column("''::tsvector"))
+        # Each field is filtered on its own vector (the books one through its
+        # GIN index); the rank sees both, as one weighted document.
+        filters = [
+            vector.op("@@")(func.to_tsquery("simple", " & ".join(query)))
+            for vector, query in ((title_vector, title_query), (category_vector, category_query)) if query
+        ]
+        tsquery = func.to_tsquery("simple", " & ".join(title_query + category_query))
+        # float8 so the rank round-trips exactly through a cursor.
+        rank = cast(func.ts_rank(title_vector.op("||")(category_vector), tsquery), Float(53))
+        return and_(*filters), rank
+
+    query = " AND ".join(
+        [f'title : "{t}" *' for t in title_terms] + [f'category : "{t}" *' for t in category_terms]
+    )
+    # bm25 is lower-is-better; negate it so both backends rank descending.
+    rank = -func.bm25(literal_column(FTS_TABLE), TITLE_WEIGHT, CATEGORY_WEIGHT)
+    return literal_column(FTS_TABLE).op("MATCH")(query), rank
+
+def search_query(dialect: str, title: Optional[str], category: Optional[str], limit: int = 100,
+                 after: Optional[tuple[float, int]] = None):
+    """Select of (book, rank) rows, best matches first, or None when there is nothing to search for.
+
+    `after` is the (rank, id) of the last book of the previous page.
+    """
+    title_terms, category_terms = terms(title), terms(category)
+    if not title_terms and not category_terms:
+        return None
+
+    match, rank = _match(dialect, title_terms, category_terms)
+    if dialect == "postgresql":
+        ranked = (
+            select(models.Book.id, rank.label("rank"))
+            .select_from(models.Book.__table__.outerjoin(models.Category.__table__))
+            .where(match)
+        )
+    else:
+        ranked = (
+            select(literal_column(f"{FTS_TABLE}.rowid").label("id"), rank.label("rank"))
+            .select_from(text(FTS_TABLE))
+            .where(match)
+        )
+    ranked = ranked.subquery()
+
+    query = select(models.Book, ranked.c.rank).join(ranked, ranked.c.id == models.Book.id)
+    if after is not None:
+        last_rank, last_id = after
+        query = query.where(or_(
+            ranked.c.rank < last_rank,
+            and_(ranked.c.rank == last_rank, models.Book.id > last_id)
+        ))
+    return query.order_by(ranked.c.rank.desc(), models.Book.id).limit(limit)
+
+def search_books(db: Session, title: Optional[str], category: Optional[str], limit: int = 100,
+                 after: Optional[tuple[float, int]] = None) -> list[tuple[models.Book, float]]:
+    """Full-text search over title and category; returns (book, rank) pairs."""
+    query = search_query(db.get_bind().dialect.name, title, category, limit, after)
+    return db.execute(query).all() if query is not None else []
@@ -0,0 +1,201 @@
+import asyncio
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from array import array
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from api import models, schemas
+from api.search import CATEGORY_WEIGHT, TITLE_WEIGHT, terms
+
+
+logger = logging.getLogger(__name__)
+
+# "database" uses the full-text index in the DB (api.search); "memory" serves
+# /books/search from the in-process index below.
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "database")
+CHECK_SECONDS = float(os.getenv("SEARCH_INDEX_CHECK_SECONDS", 30))
+MAX_AGE_SECONDS = float(os.getenv("SEARCH_INDEX_MAX_AGE_SECONDS", 600))
+
+# A word matching a term exactly scores full idf, as a prefix or through
+# trigram similarity (typos) a fraction of it.
+PREFIX_FACTOR = 0.5
+TRIGRAM_FACTOR = 0.25
+MIN_TRIGRAM_SIMILARITY = 0.4
+
+
+def trigrams(term: str) -> set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FieldIndex:
+    """Inverted index of one text field.
+
+    The vocabulary is a sorted list, so prefixes are a bisect range; postings
+    and the trigram -> term lists are unsigned int arrays.
+    """
+
+    def __init__(self, documents: list[list[str]]):
+        postings = defaultdict(list)
+        for doc, tokens in enumerate(documents):
+            for token in dict.fromkeys(tokens):
+                postings[token].append(doc)
+
+        self.doc_count = len(documents)
+        self.terms = sorted(postings)
+        self.postings = [array("I", postings[term]) for term in self.terms]
+        self.idf = array("d", (math.log(1 + self.doc_count / len(p)) for p in self.postings))
+
+        grams = defaultdict(list)
+        self.gram_counts = array("H")
+        for term_id, term in enumerate(self.terms):
+            term_grams = trigrams(term)
+            self.gram_counts.append(len(term_grams))
+            for gram in term_grams:
+                grams[gram].append(term_id)
+        self.trigrams = {gram: array("I", ids) for gram, ids in grams.items()}
+
+    def _similar(self, term: str) -> Iterable[tuple[int, float]]:
+        query = trigrams(term)
+        shared = defaultdict(int)
+        for gram in query:
+            for term_id in self.trigrams.get(gram, ()):
+                shared[term_id] += 1
+        for term_id, count in shared.items():
+            similarity = count / (len(query) + self.gram_counts[term_id] - count)
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                yield term_id, similarity
+
+    def match(self, term: str) -> dict[int, float]:
+        """Scores every document containing `term`, a word it prefixes or, failing both, a similar word."""
+        start = bisect.bisect_left(self.terms, term)
+        end = bisect.bisect_left(self.terms, term + "\uffff")
+        candidates = [(i, 1.0 if self.terms[i] == term else PREFIX_FACTOR) for i in range(start, end)]
+        if not candidates and len(term) >= 3:
+            candidates = [(i, TRIGRAM_FACTOR * similarity) for i, similarity in self._similar(term)]
+
+        scores: dict[int, float] = {}
+        for term_id, factor in candidates:
+            weight = factor * self.idf[term_id]
+            for doc in self.postings[term_id]:
+                if weight > scores.get(doc, 0.0):
+                    scores[doc] = weight
+        return scores
+
+
+class SearchIndex:
+    """Snapshot of the books table searchable without touching the database."""
+
+    def __init__(self, books: list[schemas.Book], fingerprint: tuple = ()):
+        self.books = books
+        self.ids = array("q", (book.id for book in books))
+        self.fields = {
+            "title": FieldIndex([terms(book.title) for book in books]),
+            "category": FieldIndex([terms(book.category) for book in books]),
+        }
+        self.fingerprint = fingerprint
+        self.built_at = time.monotonic()
+
+    def search(self, title: Optional[str], category: Optional[str], limit: int = 100,
+               after: Optional[tuple[float, int]] = None) -> list[tuple[schemas.Book, float]]:
+        """Same contract as api.search.search_books: every term must match its field."""
+        clauses = [("title", TITLE_WEIGHT, t) for t in terms(title)]
+        clauses += [("category", CATEGORY_WEIGHT, t) for t in terms(category)]
+        if not clauses:
+            return []
+
+        scores: Optional[dict[int, float]] = None
+        for field, weight, term in clauses:
+            matched = self.fields[field].match(term)
+            if scores is None:
+                scores = {doc: weight * score for doc, score in matched.items()}
+            else:
+                scores = {doc: total + weight * matched[doc] for doc, total in scores.items() if doc in matched}
+            if not scores:
+                return []
+
+        ranked = ((score, self.ids[doc], doc) for doc, score in scores.items())
+        if after is not None:
+            last_rank, last_id = after
+            ranked = (r for r in ranked if r[0] < last_rank or (r[0] == last_rank and r[1] > last_id))
+        page = sorted(ranked, key=lambda r: (-r[0], r[1]))[:limit]
+        return [(self.books[doc], score) for score, _, doc in page]
+
+
+version_query = select(models.DatasetVersion.version).where(models.DatasetVersion.id == 1)
+
+def fingerprint(db: Session) -> tuple:
+    """The dataset version, which populate_database bumps whenever books changed."""
+    return (db.scalar(version_query) or 0,)
+
+def build(db: Session) -> SearchIndex:
+    started = time.perf_counter()
+    signature = fingerprint(db)
+    books = [
+        schemas.Book.model_validate(book)
+        for book in db.query(models.Book).order_by(models.Book.id).yield_per(1000)
+    ]
+    index = SearchIndex(books, signature)
+    logger.info(f"Built in-memory search index of {len(books)} books in {time.perf_counter() - started:.2f}s.")
+    return index
+
+
+_index: Optional[SearchIndex] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+_async_lock = asyncio.Lock()
+
+def _is_current(now: float) -> bool:
+    return _index is not None and now - _checked_at < CHECK_SECONDS
+
+def _is_stale(signature: tuple, now: float) -> bool:
+    return _index is None or now - _index.built_at > MAX_AGE_SECONDS or signature != _index.fingerprint
+
+def get_index(db: Session) -> SearchIndex:
+    """Returns the process-wide index, rebuilding it when the dataset version changed.
+
+    The version is read at most every CHECK_SECONDS, and the index is rebuilt
+    unconditionally after MAX_AGE_SECONDS to pick up writes made outside the loader.
+    """
+    global _index, _checked_at
+    now = time.monotonic()
+    if _is_current(now):
+        return _index
+    with _lock:
+        if _is_current(now):
+            return _index
+        if _is_stale(fingerprint(db), now):
+            _index = build(db)
+        _checked_at = time.monotonic()
+        return _index
+
+async def get_index_async(db: AsyncSession) -> SearchIndex:
+    """get_index for the async session; the index itself is built off the event loop."""
+    global _index, _checked_at
+    now = time.monotonic()
+    if _is_current(now):
+        return _index
+    async with _async_lock:
+        if _is_current(now):
+            return _index
+        signature = (await db.scalar(version_query) or 0,)
+        if _is_stale(signature, now):
+            result = await db.execute(select(models.Book).order_by(models.Book.id))
+            books = [schemas.Book.model_validate(book) for book in result.scalars()]
+            _index = await asyncio.to_thread(SearchIndex, books, signature)
+            logger.info(f"Built in-memory search index of {len(books)} books.")
+        _checked_at = time.monotonic()
+        return _index
+
+def search_books(db: Session, title: Optional[str], category: Optional[str], limit: int = 100,
+                 after: Optional[tuple[float, int]] = None) -> list[tuple[schemas.Book, float]]:
+    return get_index(db).search(title, category, limit=limit, after=after)
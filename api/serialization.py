@@ -0,0 +1,23 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+# UTC datetimes as "...Z", like pydantic renders them.
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """Serializes plain rows with orjson, skipping response_model validation.
+
+    Routes using it keep their response_model for the OpenAPI schema; the
+    rows must already have the schema's fields and types.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
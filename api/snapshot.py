@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from api import models, schemas
+from api.crud import book_rows_query
+from api.search_index import version_query
+
+
+logger = logging.getLogger(__name__)
+
+# "database" runs /stats/*, /books/top-rated and /books/price-range as SQL;
+# "memory" answers them from the per-worker columnar snapshot below.
+ANALYTICS_BACKEND = os.getenv("ANALYTICS_BACKEND", "database")
+CHECK_SECONDS = float(os.getenv("SNAPSHOT_CHECK_SECONDS", 30))
+
+
+class CatalogSnapshot:
+    """Column arrays of the books table, positioned by ascending id.
+
+    Missing prices are NaN, missing ratings -1 and books without a category
+    get code -1; `rows` holds each book as the dict the API returns.
+    """
+
+    def __init__(self, rows: list[dict], fingerprint: tuple = ()):
+        self.rows = rows
+        self.fingerprint = fingerprint
+        self.built_at = time.monotonic()
+
+        self.ids = np.fromiter((r["id"] for r in rows), dtype=np.int64, count=len(rows))
+        self.price = np.array([r["price"] for r in rows], dtype=np.float64)
+        self.rating = np.fromiter(
+            (-1 if r["rating"] is None else r["rating"] for r in rows), dtype=np.int16, count=len(rows)
+        )
+        self.availability = np.fromiter(
+            (r["availability"] or 0 for r in rows), dtype=np.int32, count=len(rows)
+        )
+        names = np.array([r["category"] or "" for r in rows], dtype=object)
+        self.category_names, codes = np.unique(names, return_inverse=True)
+        self.category_codes = codes.astype(np.int32)
+        if len(self.category_names) and self.category_names[0] == "":
+            self.category_names = self.category_names[1:]
+            self.category_codes -= 1
+
+        # Positions sorted by price (NaN last) and by (rating desc, id), built
+        # once so range queries and top-k are a slice instead of a sort.
+        self.price_order = np.argsort(self.price, kind="stable")
+        self.sorted_price = self.price[self.price_order]
+        self.rating_order = np.lexsort((self.ids, -self.rating.astype(np.int32)))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def stats_overview(self) -> schemas.StatsOverview:
+        average = np.nanmean(self.price) if np.any(~np.isnan(self.price)) else 0.0
+        rated = self.rating[self.rating >= 0]
+        values, counts = np.unique(rated, return_counts=True)
+        return schemas.StatsOverview(
+            total_books=len(self),
+            average_price=round(float(average), 2) if average else 0.0,
+            rating_distribution=[
+                schemas.RatingDistribution(rating=int(v), count=int(c)) for v, c in zip(values, counts)
+            ]
+        )
+
+    def stats_categories(self) -> list[schemas.CategoryStats]:
+        categorized = self.category_codes >= 0
+        codes = self.category_codes[categorized]
+        prices = self.price[categorized]
+        priced = ~np.isnan(prices)
+        size = len(self.category_names)
+        book_count = np.bincount(codes, minlength=size)
+        price_count = np.bincount(codes[priced], minlength=size)
+        price_sum = np.bincount(codes[priced], weights=prices[priced], minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            average = price_sum / price_count
+        order = np.lexsort((self.category_names, -book_count))
+        return [
+            schemas.CategoryStats(
+                category=self.category_names[i],
+                book_count=int(book_count[i]),
+                average_price=round(float(average[i]), 2) if price_count[i] else None
+            ) for i in order if book_count[i]
+        ]
+
+    def top_rated(self, limit: int = 10) -> list[dict]:
+        return [self.rows[i] for i in self.rating_order[:max(limit, 0)]]
+
+    def price_range(self, min_price: float, max_price: float, limit: int = 100) -> list[dict]:
+        start = np.searchsorted(self.sorted_price, min_price, side="left")
+        end = np.searchsorted(self.sorted_price, max_price, side="right")
+        return [self.rows[i] for i in self.price_order[start:min(end, start + max(limit, 0))]]
+
+
+def build(db: Session) -> CatalogSnapshot:
+    started = time.perf_counter()
+    signature = (db.scalar(version_query) or 0,)
+    rows = [row._asdict() for row in db.execute(book_rows_query().order_by(models.Book.id))]
+    snapshot = CatalogSnapshot(rows, signature)
+    logger.info(f"Built catalog snapshot of {len(rows)} books in {time.perf_counter() - started:.2f}s.")
+    return snapshot
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+_async_lock = asyncio.Lock()
+
+def _is_current(now: float, version: Optional[int] = None) -> bool:
+    if _snapshot is None:
+        return False
+    if version is not None:
+        # Not older than the version the caller answers for; no timer involved.
+        return _snapshot.fingerprint[0] >= version
+    return now - _checked_at < CHECK_SECONDS
+
+def get_snapshot(db: Session) -> CatalogSnapshot:
+    """Returns the process-wide snapshot, rebuilt once the dataset version moves on.
+
+    The version is read at most every CHECK_SECONDS; the old snapshot keeps
+    serving until the new one is complete.
+    """
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    if _is_current(now):
+        return _snapshot
+    with _lock:
+        if _is_current(now):
+            return _snapshot
+        if _snapshot is None or (db.scalar(version_query) or 0,) != _snapshot.fingerprint:
+            _snapshot = build(db)
+        _checked_at = time.monotonic()
+        return _snapshot
+
+async def get_snapshot_async(db: AsyncSession, version: Optional[int] = None) -> CatalogSnapshot:
+    """get_snapshot for the async session; the arrays are built off the event loop.
+
+    With `version` (the dataset version a cached response is keyed on), a
+    snapshot older than it is rebuilt right away instead of after CHECK_SECONDS.
+    """
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    if _is_current(now, version):
+        return _snapshot
+    async with _async_lock:
+        if _is_current(now, version):
+            return _snapshot
+        signature = (await db.scalar(version_query) or 0,)
+        if _snapshot is None or signature != _snapshot.fingerprint:
+            result = await db.execute(book_rows_query().order_by(models.Book.id))
+            rows = [row._asdict() for row in result]
+            _snapshot = await asyncio.to_thread(CatalogSnapshot, rows, signature)
+            logger.info(f"Built catalog snapshot of {len(rows)} books.")
+        _checked_at = time.monotonic()
+        return _snapshot
@@ -0,0 +1,72 @@
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from api import crud, snapshot
+from api.database import SessionLocal
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def measure(fn, repeat: int) -> tuple[float, float, int]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    size = len(result) if isinstance(result, list) else len(getattr(result, "rating_distribution", []))
+    return statistics.median(timings), p95, size
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compares the SQL path of /stats/*, /books/top-rated and /books/price-range "
+                    "with the in-memory catalog snapshot on the current database."
+    )
+    parser.add_argument("--repeat", type=int, default=200, help="Runs per query and backend")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        snap = snapshot.build(db)
+        build_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Snapshot: {len(snap)} books, built in {build_ms:.1f} ms.")
+
+        # (label, SQL path as served today, snapshot path)
+        queries = [
+            ("stats overview (stored)", lambda: crud.get_stats_overview(db), snap.stats_overview),
+            ("stats overview (live)", lambda: crud.compute_stats_overview(db), snap.stats_overview),
+            ("stats categories (stored)", lambda: crud.get_stats_categories(db), snap.stats_categories),
+            ("stats categories (live)", lambda: crud.compute_stats_categories(db), snap.stats_categories),
+            ("top-rated 10", lambda: crud.get_top_rated_books(db, 10), lambda: snap.top_rated(10)),
+            ("top-rated 100", lambda: crud.get_top_rated_books(db, 100), lambda: snap.top_rated(100)),
+            ("price-range 10-20", lambda: crud.get_books_by_price_range(db, 10, 20),
+             lambda: snap.price_range(10, 20)),
+            ("price-range 0-100", lambda: crud.get_books_by_price_range(db, 0, 100),
+             lambda: snap.price_range(0, 100)),
+        ]
+        print(f"{'query':<28}{'sql p50/p95 ms (rows)':>30}{'snapshot p50/p95 ms (rows)':>32}{'speedup':>10}")
+        for label, sql_fn, snapshot_fn in queries:
+            sql_p50, sql_p95, sql_rows = measure(sql_fn, args.repeat)
+            db.expunge_all()
+            mem_p50, mem_p95, mem_rows = measure(snapshot_fn, args.repeat)
+            sql_cell = f"{sql_p50:.3f}/{sql_p95:.3f} ({sql_rows})"
+            mem_cell = f"{mem_p50:.4f}/{mem_p95:.4f} ({mem_rows})"
+            print(f"{label:<28}{sql_cell:>30}{mem_cell:>32}{sql_p50 / mem_p50:>9.0f}x")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
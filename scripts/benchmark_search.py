@@ -0,0 +1,92 @@
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from sqlalchemy import and_
+
+from api import models, search, search_index
+from api.database import SessionLocal
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUERIES = [
+    ("light", None),
+    ("the", None),
+    ("harry potter", None),
+    ("love", "fiction"),
+    (None, "poetry"),
+    ("sapiens", None),
+    ("zzzzz", None),
+]
+
+
+def ilike_search(db, title, category, limit=100):
+    """The original /books/search query, kept here as the baseline."""
+    query = db.query(models.Book)
+    filters = []
+    if title:
+        filters.append(models.Book.title.ilike(f"%{title}%"))
+    if category:
+        filters.append(models.Book.category.ilike(f"%{category}%"))
+    if filters:
+        query = query.filter(and_(*filters))
+    return query.limit(limit).all()
+
+
+def measure(fn, repeat: int) -> tuple[float, float, int]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return statistics.median(timings), p95, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares /books/search backends on the current database.")
+    parser.add_argument("--repeat", type=int, default=50, help="Runs per query and backend")
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        index = search_index.build(db)
+        build_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Index: {len(index.books)} books, built in {build_ms:.1f} ms.")
+
+        backends = {
+            "ilike": lambda t, c: ilike_search(db, t, c, args.limit),
+            "fulltext": lambda t, c: search.search_books(db, t, c, args.limit),
+            "memory": lambda t, c: index.search(t, c, args.limit),
+        }
+        print(f"{'query':<26}" + "".join(f"{name + ' p50/p95 ms (hits)':>34}" for name in backends))
+        for title, category in QUERIES:
+            label = f"title={title}" if title else f"category={category}"
+            if title and category:
+                label += f",category={category}"
+            cells = []
+            for fn in backends.values():
+                try:
+                    p50, p95, hits = measure(lambda: fn(title, category), args.repeat)
+                    cells.append(f"{p50:.3f}/{p95:.3f} ({hits})")
+                except Exception as e:
+                    db.rollback()
+                    cells.append(f"unavailable: {type(e).__name__}")
+            print(f"{label:<26}" + "".join(f"{cell:>34}" for cell in cells))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from api import crud, schemas
+from api.database import SessionLocal
+from api.serialization import dumps
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+books_adapter = TypeAdapter(List[schemas.Book])
+
+
+def orm_pydantic(db, limit):
+    """The previous path: ORM objects validated through schemas.Book."""
+    books = crud.get_books(db, limit=limit)
+    return books_adapter.dump_json(books_adapter.validate_python(books, from_attributes=True))
+
+def orm_jsonable(db, limit):
+    """ORM objects through jsonable_encoder, as older FastAPI versions serialize a response_model."""
+    books = books_adapter.validate_python(crud.get_books(db, limit=limit), from_attributes=True)
+    return json.dumps(jsonable_encoder(books)).encode()
+
+def tuples_orjson(db, limit):
+    """The fast path: selected columns as rows, dumped with orjson."""
+    return dumps(crud.get_book_rows(db, limit=limit))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row cost of serializing /books pages.")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    paths = {"orm + pydantic": orm_pydantic, "orm + jsonable_encoder": orm_jsonable, "tuples + orjson": tuples_orjson}
+    db = SessionLocal()
+    try:
+        rows = len(crud.get_book_rows(db, limit=args.limit))
+        if not rows:
+            logger.error("The books table is empty; load it first (python scripts/load_to_db.py).")
+            return
+        print(f"{rows} rows per request, {args.repeat} runs each")
+        print(f"{'path':<26}{'p50 ms':>10}{'per row us':>14}{'bytes':>10}")
+        for name, fn in paths.items():
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                body = fn(db, args.limit)
+                timings.append(time.perf_counter() - started)
+                db.expunge_all()
+            p50 = statistics.median(timings)
+            print(f"{name:<26}{p50 * 1000:>10.2f}{p50 / rows * 1e6:>14.2f}{len(body):>10}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
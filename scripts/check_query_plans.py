@@ -0,0 +1,144 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from dataclasses import dataclass
+from typing import Callable
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from sqlalchemy import event, inspect, text
+
+from api import crud
+from api.database import SessionLocal
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Check:
+    name: str
+    call: Callable
+    # Queries that read every row by design (whole-table aggregates, exports).
+    full_scan_ok: bool = False
+    # Queries whose ORDER BY an index should satisfy without a sort step.
+    sort_ok: bool = True
+
+
+# Every read query in api.crud (api.crud_async issues the same statements).
+CHECKS = [
+    Check("get_book_id", lambda db: crud.get_book_id(db, 1)),
+    # OFFSET walks the skipped rows in id order; SQLite reports that rowid walk as a scan.
+    Check("get_books offset", lambda db: crud.get_books(db, skip=100, limit=50), full_scan_ok=True, sort_ok=False),
+    Check("get_books cursor", lambda db: crud.get_books(db, after_id=100, limit=50), sort_ok=False),
+    Check("get_book_rows", lambda db: crud.get_book_rows(db, after_id=100, limit=50), sort_ok=False),
+    Check("search_books", lambda db: crud.search_books(db, "the", None, limit=20)),
+    Check("get_categories", lambda db: crud.get_categories(db), sort_ok=False),
+    Check("compute_stats_overview", lambda db: crud.compute_stats_overview(db), full_scan_ok=True),
+    Check("compute_stats_categories", lambda db: crud.compute_stats_categories(db)),
+    Check("get_stats_overview", lambda db: crud.get_stats_overview(db)),
+    Check("get_dataset_version", lambda db: crud.get_dataset_version(db)),
+    Check("get_top_rated_books", lambda db: crud.get_top_rated_books(db, limit=10), sort_ok=False),
+    Check("get_books_by_price_range", lambda db: crud.get_books_by_price_range(db, 10, 20), sort_ok=False),
+    Check("get_user", lambda db: crud.get_user(db, 1)),
+    Check("get_user_by_email", lambda db: crud.get_user_by_email(db, "admin@example.com")),
+    Check("get_user_by_username", lambda db: crud.get_user_by_username(db, "admin")),
+    Check("get_load_job", lambda db: crud.get_load_job(db, 1)),
+    Check("get_ml_features", lambda db: crud.get_ml_features(db, limit=1000), full_scan_ok=True),
+    Check("get_ml_training_data", lambda db: crud.get_ml_training_data(db, limit=1000), full_scan_ok=True),
+]
+
+
+def capture_statements(db, call) -> list:
+    """Runs a crud function and returns the (sql, parameters) it sent to the driver."""
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+    bind = db.get_bind()
+    event.listen(bind, "before_cursor_execute", capture)
+    try:
+        call(db)
+    finally:
+        event.remove(bind, "before_cursor_execute", capture)
+    return statements
+
+
+def _postgres_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _postgres_nodes(child)
+
+def plan_problems(db, statement, parameters, tables: set) -> tuple[list[str], list[str], list[str]]:
+    """EXPLAINs one statement; returns (plan lines, full scans, sorts)."""
+    conn = db.connection()
+    if conn.dialect.name == "postgresql":
+        plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        nodes = list(_postgres_nodes(plan[0]["Plan"]))
+        lines = [f"{n['Node Type']} {n.get('Relation Name') or n.get('Index Name') or ''}".strip() for n in nodes]
+        scans = [n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in tables]
+        sorts = [line for line in lines if line.startswith(("Sort", "Incremental Sort"))]
+    else:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        lines = [row[-1] for row in rows]
+        # "SCAN books" reads the table; "SCAN books USING INDEX ..." walks an index in order.
+        scans = [m.group(1) for m in (re.fullmatch(r"SCAN (\w+)", line) for line in lines) if m and m.group(1) in tables]
+        sorts = [line for line in lines if "TEMP B-TREE" in line]
+    return lines, scans, sorts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="EXPLAINs every crud read query against DATABASE_URL and exits non-zero "
+                    "if a hot query falls back to a sequential scan or an avoidable sort."
+    )
+    parser.add_argument("--verbose", action="store_true", help="Print every plan")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    failures = 0
+    try:
+        dialect = db.get_bind().dialect.name
+        tables = set(inspect(db.get_bind()).get_table_names())
+        if dialect == "postgresql":
+            # Small local tables make a seq scan (or a sort) the cheapest plan
+            # anyway; with both penalized, they only show up when no index can
+            # serve the query.
+            db.execute(text("SET LOCAL enable_seqscan = off"))
+            db.execute(text("SET LOCAL enable_sort = off"))
+        logger.info(f"Checking query plans on {dialect}")
+
+        for check in CHECKS:
+            statements = capture_statements(db, check.call)
+            problems = []
+            for statement, parameters in statements:
+                lines, scans, sorts = plan_problems(db, statement, parameters, tables)
+                if args.verbose:
+                    print(f"-- {check.name}\n{statement}\n  " + "\n  ".join(lines))
+                if scans and not check.full_scan_ok:
+                    problems.append(f"sequential scan on {', '.join(scans)}")
+                if sorts and not check.sort_ok:
+                    problems.append(f"sort step ({'; '.join(sorts)})")
+            if problems:
+                failures += 1
+                logger.error(f"FAIL {check.name}: {'; '.join(problems)}")
+            else:
+                logger.info(f"ok   {check.name} ({len(statements)} statement(s))")
+    finally:
+        db.rollback()
+        db.close()
+
+    if failures:
+        logger.error(f"{failures} of {len(CHECKS)} queries regressed.")
+        sys.exit(1)
+    logger.info(f"All {len(CHECKS)} queries use their indexes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+import os
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from bs4 import BeautifulSoup
+
+from scripts.http_cache import HttpCache
+from scripts.parsers import parse_categories, parse_listing_html, parse_product_html
+from scripts.writers import StreamingOutput
+
+
+class PageJob(NamedTuple):
+    cat_index: int
+    cat_name: str
+    cat_url: str
+    page_no: int
+    url: str
+
+
+class Page(NamedTuple):
+    body: str
+    changed: bool
+
+
+class HostRateLimiter:
+    """Spaces requests to the same host so that at most `rate` start per second."""
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, url: str):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def decode_body(response: httpx.Response) -> str:
+    # Mirror requests' Response.text: pages served without a charset are
+    # decoded as ISO-8859-1, so both engines produce byte-identical rows.
+    return response.content.decode(response.charset_encoding or "ISO-8859-1", errors="replace")
+
+
+class DetailEnricher:
+    """Adds product-page fields to listing rows, fetching each product at most once.
+
+    Rows whose product_url is in `known` (already enriched in the database)
+    are filled from there without a request; the rest are fetched through the
+    crawler's client with at most `concurrency` detail requests in flight.
+    """
+
+    def __init__(self, crawler: "AsyncCrawler", concurrency: int = 16, known: Optional[dict] = None):
+        self.crawler = crawler
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.known = known or {}
+        self.inflight: dict[str, asyncio.Task] = {}
+        self.fetched = 0
+        self.reused = 0
+        self.failed = 0
+
+    async def enrich(self, books: list[dict]):
+        await asyncio.gather(*(self._enrich_book(book) for book in books))
+
+    async def _enrich_book(self, book: dict):
+        url = book["product_url"]
+        details = self.known.get(url)
+        if details is not None:
+            self.reused += 1
+        else:
+            if url not in self.inflight:
+                self.inflight[url] = asyncio.create_task(self._fetch(url))
+            details = await self.inflight[url]
+        book.update(details or {})
+
+    async def _fetch(self, url: str) -> Optional[dict]:
+        try:
+            async with self.semaphore:
+                page = await self.crawler.fetch(url)
+            details = await self.crawler.run_parser(parse_product_html, page.body, self.crawler.parser)
+        except Exception as e:
+            self.failed += 1
+            print(f"⚠️  Could not read product page {url}: {e}")
+            return None
+        self.fetched += 1
+        return details
+
+
+class AsyncCrawler:
+    """Crawls every category through two stages joined by a bounded queue.
+
+    `concurrency` fetch workers share one pooled HTTP client and push raw HTML
+    onto the parse queue; parse workers hand each page to a process pool so
+    CPU-bound parsing never stalls the network loop. Parsed pages go straight
+    to `output`, so memory stays flat and pages checkpointed by an earlier,
+    interrupted run are skipped.
+
+    With an `HttpCache` every request is conditional and pages whose content
+    did not change reuse their cached parse; `incremental` then restricts the
+    output to categories with at least one changed page (buffering a category
+    until all of its pages are in). An optional `DetailEnricher` completes each
+    page's rows from the product pages before they are written.
+    """
+
+    def __init__(self, site_url: str, headers: dict, output: StreamingOutput, concurrency: int = 8,
+                 rate: Optional[float] = 10.0, timeout: float = 30.0, retries: int = 3,
+                 parse_workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 parser: str = "html.parser", cache: Optional[HttpCache] = None,
+                 incremental: bool = False, detail_concurrency: Optional[int] = None,
+                 known_details: Optional[dict] = None):
+        self.site_url = site_url
+        self.headers = headers
+        self.output = output
+        self.concurrency = max(1, concurrency)
+        self.limiter = HostRateLimiter(rate)
+        self.timeout = timeout
+        self.retries = max(1, retries)
+        self.parse_workers = (os.cpu_count() or 1) if parse_workers is None else parse_workers
+        self.queue_size = queue_size or self.concurrency * 2
+        self.parser = parser
+        self.cache = cache
+        self.incremental = incremental
+        self.details = DetailEnricher(self, detail_concurrency, known_details) if detail_concurrency else None
+        self.client: Optional[httpx.AsyncClient] = None
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.failed: list[tuple[str, Exception]] = []
+        self.changed_categories: set[int] = set()
+        self.not_modified = 0
+        self.resumed = 0
+        self._category_pending: dict[int, int] = {}
+        self._category_pages: dict[int, list[tuple]] = {}
+        self._failed_categories: set[int] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._pending = 0
+        self._done = asyncio.Event()
+
+    async def fetch(self, url: str) -> Page:
+        conditional = self.cache.conditional_headers(url) if self.cache else {}
+        for attempt in range(self.retries):
+            await self.limiter.wait(url)
+            try:
+                response = await self.client.get(url, headers=conditional)
+                if response.status_code == 304 and self.cache:
+                    self.not_modified += 1
+                    self.cache.touch(url)
+                    return Page(self.cache.get(url).body, changed=False)
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    body = decode_body(response)
+                    changed = True
+                    if self.cache:
+                        changed = self.cache.store(url, body, response.headers.get("ETag"),
+                                                   response.headers.get("Last-Modified"))
+                    return Page(body, changed)
+                error = httpx.HTTPStatusError(f"Server error {response.status_code}",
+                                              request=response.request, response=response)
+            except httpx.TransportError as e:
+                error = e
+            if attempt + 1 < self.retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        raise error
+
+    async def parse(self, job: PageJob, page: Page):
+        if not page.changed and self.cache:
+            parsed = self.cache.get_parsed(job.url)
+            if parsed is not None:
+                return parsed
+        parsed = await self.run_parser(parse_listing_html, page.body, job.cat_name, job.url,
+                                       self.site_url, self.parser)
+        if self.cache:
+            self.cache.store_parsed(job.url, parsed)
+        return parsed
+
+    async def run_parser(self, func, *args):
+        if self.pool is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+
+    async def crawl(self):
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        if self.parse_workers > 0:
+            self.pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        try:
+            async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout,
+                                         limits=limits, follow_redirects=True) as client:
+                self.client = client
+                index = BeautifulSoup((await self.fetch(self.site_url)).body, "html.parser")
+                categories = parse_categories(index, self.site_url)
+
+                fetch_queue: asyncio.Queue[PageJob] = asyncio.Queue()
+                parse_queue: asyncio.Queue[tuple[PageJob, Page]] = asyncio.Queue(maxsize=self.queue_size)
+                for cat_index, (name, url) in enumerate(categories):
+                    self._enqueue(fetch_queue, PageJob(cat_index, name, url, 1, url))
+                if not self._pending:
+                    self._done.set()
+
+                workers = [asyncio.create_task(self._fetch_worker(fetch_queue, parse_queue))
+                           for _ in range(self.concurrency)]
+                workers += [asyncio.create_task(self._parse_worker(parse_queue, fetch_queue))
+                            for _ in range(max(1, self.parse_workers))]
+
+                # Parsing the first page of a category schedules the rest of it,
+                # so a job only counts as finished once its page has been parsed.
+                await self._done.wait()
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+
+        if self.failed:
+            url, error = self.failed[0]
+            raise RuntimeError(f"{len(self.failed)} page(s) failed, first: {url} ({error})")
+
+    async def _fetch_worker(self, fetch_queue: asyncio.Queue, parse_queue: asyncio.Queue):
+        while True:
+            job = await fetch_queue.get()
+            try:
+                page = await self.fetch(job.url)
+                await parse_queue.put((job, page))
+            except Exception as e:
+                self._fail(job, e)
+                self._finish(job)
+            finally:
+                fetch_queue.task_done()
+
+    async def _parse_worker(self, parse_queue: asyncio.Queue, fetch_queue: asyncio.Queue):
+        while True:
+            job, page = await parse_queue.get()
+            try:
+                books, next_url, page_count = await self.parse(job, page)
+                if page.changed:
+                    self.changed_categories.add(job.cat_index)
+                self._schedule_next(job, next_url, page_count, fetch_queue)
+            except Exception as e:
+                self._fail(job, e)
+                self._finish(job)
+            else:
+                # Detail fetches can take a while; don't hold up the next page.
+                task = asyncio.create_task(self._complete_page(job, books, next_url, page_count))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            finally:
+                parse_queue.task_done()
+
+    async def _complete_page(self, job: PageJob, books: list[dict], next_url: Optional[str],
+                             page_count: Optional[int]):
+        try:
+            if self.details:
+                await self.details.enrich(books)
+            if self.incremental:
+                self._category_pages.setdefault(job.cat_index, []).append((job.url, books, next_url, page_count))
+            else:
+                self.output.write_page(job.url, books, next_url, page_count)
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            self._finish(job)
+
+    def _enqueue(self, fetch_queue: asyncio.Queue, job: PageJob):
+        completed = self.output.completed(job.url)
+        if completed is not None:
+            self.resumed += 1
+            self._schedule_next(job, *completed, fetch_queue)
+            return
+        self._pending += 1
+        self._category_pending[job.cat_index] = self._category_pending.get(job.cat_index, 0) + 1
+        fetch_queue.put_nowait(job)
+
+    def _fail(self, job: PageJob, error: Exception):
+        self.failed.append((job.url, error))
+        self._failed_categories.add(job.cat_index)
+
+    def _finish(self, job: PageJob):
+        self._category_pending[job.cat_index] -= 1
+        if not self._category_pending[job.cat_index]:
+            self._finish_category(job.cat_index)
+        self._pending -= 1
+        if not self._pending:
+            self._done.set()
+
+    def _finish_category(self, cat_index: int):
+        pages = self._category_pages.pop(cat_index, [])
+        if cat_index in self._failed_categories:
+            return
+        for url, books, next_url, page_count in pages:
+            if cat_index in self.changed_categories:
+                self.output.write_page(url, books, next_url, page_count)
+            else:
+                self.output.skip_page(url, next_url, page_count)
+
+    def _schedule_next(self, job: PageJob, next_url: Optional[str], page_count: Optional[int],
+                       fetch_queue: asyncio.Queue):
+        # Listing pages announce "Page 1 of N", so the first page fans out the
+        # rest of the category at once; otherwise follow li.next one by one.
+        if job.page_no == 1 and page_count:
+            for page_no in range(2, page_count + 1):
+                url = urljoin(job.cat_url, f"page-{page_no}.html")
+                self._enqueue(fetch_queue, job._replace(page_no=page_no, url=url))
+        elif next_url and not page_count:
+            self._enqueue(fetch_queue, job._replace(page_no=job.page_no + 1, url=next_url))
+
+
+def crawl(site_url: str, headers: dict, output: StreamingOutput, concurrency: int = 8,
+          rate: Optional[float] = 10.0, parse_workers: Optional[int] = None, parser: str = "html.parser",
+          cache_path: Optional[str] = None, incremental: bool = False,
+          detail_concurrency: Optional[int] = None, known_details: Optional[dict] = None):
+    cache = HttpCache(cache_path) if cache_path else None
+    crawler = AsyncCrawler(site_url, headers, output, concurrency=concurrency, rate=rate,
+                           parse_workers=parse_workers, parser=parser,
+                           cache=cache, incremental=incremental,
+                           detail_concurrency=detail_concurrency, known_details=known_details)
+    try:
+        asyncio.run(crawler.crawl())
+    finally:
+        if cache:
+            cache.close()
+    if cache:
+        print(f"♻️  Pages not modified: {crawler.not_modified} | "
+              f"categories changed: {len(crawler.changed_categories)}")
+    if crawler.details:
+        details = crawler.details
+        print(f"🔎 Product pages fetched: {details.fetched} | "
+              f"reused from database: {details.reused} | failed: {details.failed}")
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import sqlite3
+import time
+from typing import NamedTuple, Optional
+
+
+class CachedPage(NamedTuple):
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    body: str
+    parsed: Optional[str]
+
+
+def content_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    """Persistent per-URL store of validators, page bodies and parse results.
+
+    Lets repeated crawls send conditional requests (If-None-Match /
+    If-Modified-Since) and reuse the previous parse of a page whose content
+    hash did not change.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                body TEXT NOT NULL,
+                parsed TEXT,
+                fetched_at REAL
+            )"""
+        )
+        self.conn.commit()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        row = self.conn.execute(
+            "SELECT url, etag, last_modified, content_hash, body, parsed FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        return CachedPage(*row) if row else None
+
+    def conditional_headers(self, url: str) -> dict:
+        cached = self.get(url)
+        headers = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def store(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> bool:
+        """Saves a fresh response and returns whether its content changed."""
+        digest = content_hash(body)
+        cached = self.get(url)
+        changed = cached is None or cached.content_hash != digest
+        self.conn.execute(
+            """INSERT INTO pages (url, etag, last_modified, content_hash, body, parsed, fetched_at)
+               VALUES (?, ?, ?, ?, ?, NULL, ?)
+               ON CONFLICT(url) DO UPDATE SET
+                   etag = excluded.etag,
+                   last_modified = excluded.last_modified,
+                   content_hash = excluded.content_hash,
+                   body = excluded.body,
+                   parsed = CASE WHEN pages.content_hash = excluded.content_hash THEN pages.parsed END,
+                   fetched_at = excluded.fetched_at""",
+            (url, etag, last_modified, digest, body, time.time()),
+        )
+        self.conn.commit()
+        return changed
+
+    def touch(self, url: str):
+        self.conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+        self.conn.commit()
+
+    def get_parsed(self, url: str):
+        cached = self.get(url)
+        return json.loads(cached.parsed) if cached and cached.parsed else None
+
+    def store_parsed(self, url: str, parsed):
+        self.conn.execute("UPDATE pages SET parsed = ? WHERE url = ?", (json.dumps(parsed), url))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
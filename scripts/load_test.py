@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+
+DEFAULT_PATHS = [
+    "/api/v1/health",
+    "/api/v1/books/{id}",
+    "/api/v1/books/search?title=the&limit=20",
+    "/api/v1/books?limit=50&skip={offset}",
+]
+
+
+async def worker(client: httpx.AsyncClient, paths: list[str], deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        path = random.choice(paths).format(id=random.randint(1, 1000), offset=random.randint(0, 950))
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(url: str, concurrency: int, duration: float, paths: list[str]):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await client.get("/api/v1/health")
+        latencies, errors = [], []
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(worker(client, paths, deadline, latencies, errors) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    print(f"url={url} concurrency={concurrency} duration={elapsed:.1f}s")
+    print(f"requests={len(latencies)} errors={len(errors)} throughput={len(latencies) / elapsed:.1f} req/s")
+    if latencies:
+        print(f"latency ms: p50={pct(0.50):.1f} p95={pct(0.95):.1f} p99={pct(0.99):.1f} "
+              f"mean={statistics.mean(latencies) * 1000:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drives the read endpoints of a running API at a fixed concurrency. "
+                    "To compare, run it once per git revision or server setting (e.g. DB_POOL_SIZE, "
+                    "ANALYTICS_BACKEND, worker count) and keep everything else the same."
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds")
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="Path to request (repeatable); {id} and {offset} are randomized")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.duration, args.paths or DEFAULT_PATHS))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 import pandas as pd
+import csv
+import itertools
 import logging
 import os
 import sys
@@ -7,66 +9,382 @@ BASE_DIR = BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))
 
 sys.path.append(BASE_DIR)
 
+from sqlalchemy import MetaData, Table, select, text
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlalchemy.dialects import postgresql, sqlite
+
+from api import crud, features, search
 from api.database import SessionLocal, engine
-from api.models import Base, Book
+from api.models import Base, Book, Category
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 FINAL_CSV_PATH = os.path.join(BASE_DIR, "data", "books.csv")
+LOAD_BATCH_SIZE = int(os.getenv("LOAD_BATCH_SIZE", 500))
+STAGING_TABLE = "books_staging"
+
+dialect_inserts = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _normalize(column, value):
+    """Coerces a CSV value to the column's Python type so comparisons are exact."""
+    if value is None:
+        return None
+    return column.type.python_type(value)
+
+def _chunk_records(chunk: pd.DataFrame) -> list[dict]:
+    if 'id' in chunk.columns:
+        chunk = chunk.drop(columns=['id'])
+    # Optional columns (e.g. product details) come back as NaN when empty.
+    chunk = chunk.astype(object).where(chunk.notna(), None)
+    return chunk.to_dict(orient="records")
+
+def category_ids(db, names) -> dict[str, int]:
+    """Maps category names to their ids in the categories lookup, adding new ones."""
+    names = {n for n in names if n is not None}
+    if not names:
+        return {}
+    table = Category.__table__
+    insert = dialect_inserts.get(db.bind.dialect.name)
+    if insert is not None:
+        db.execute(insert(table).values([{"name": n} for n in sorted(names)]).on_conflict_do_nothing())
+    else:
+        known = set(db.execute(select(table.c.name).where(table.c.name.in_(names))).scalars())
+        if names - known:
+            db.execute(table.insert(), [{"name": n} for n in sorted(names - known)])
+    return dict(db.execute(select(table.c.name, table.c.id).where(table.c.name.in_(names))).all())
+
+def _with_category_ids(db, books_data: list[dict]) -> list[dict]:
+    """Replaces each row's category name with its category_id."""
+    if not books_data or "category" not in books_data[0]:
+        return books_data
+    ids = category_ids(db, (row["category"] for row in books_data))
+    return [
+        {**{k: v for k, v in row.items() if k != "category"}, "category_id": ids.get(row["category"])}
+        for row in books_data
+    ]
+
+def upsert_books(db, books_data: list[dict], batch_size: int = LOAD_BATCH_SIZE) -> dict:
+    """Inserts new books and updates changed ones, matched on product_url.
+
+    Each batch is compared against the stored rows first, so unchanged books
+    are never rewritten and their index entries are left alone.
+    """
+    table = Book.__table__
+    books_data = _with_category_ids(db, books_data)
+    columns = [c for c in books_data[0] if c in table.columns and c != "id"] if books_data else []
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    insert = dialect_inserts.get(db.bind.dialect.name)
+
+    for start in range(0, len(books_data), batch_size):
+        # Later duplicates of a product_url win, as ON CONFLICT can't touch a row twice per statement.
+        batch = {
+            row["product_url"]: {c: _normalize(table.c[c], row.get(c)) for c in columns}
+            for row in books_data[start:start + batch_size]
+        }
+        existing = {
+            row.product_url: row
+            for row in db.execute(
+                select(table.c.id, *[table.c[c] for c in columns]).where(table.c.product_url.in_(list(batch)))
+            )
+        }
+
+        new_rows, changed_rows = [], []
+        for url, row in batch.items():
+            current = existing.get(url)
+            if current is None:
+                new_rows.append(row)
+            elif any(getattr(current, c) != row[c] for c in columns):
+                changed_rows.append({**row, "id": current.id})
+            else:
+                counts["unchanged"] += 1
+        counts["inserted"] += len(new_rows)
+        counts["updated"] += len(changed_rows)
+
+        if insert is not None and (new_rows or changed_rows):
+            stmt = insert(table).values([{c: row[c] for c in columns} for row in new_rows + changed_rows])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.product_url],
+                set_={c: stmt.excluded[c] for c in columns if c != "product_url"}
+            )
+            db.execute(stmt)
+        else:
+            if new_rows:
+                db.bulk_insert_mappings(Book, new_rows)
+            if changed_rows:
+                db.bulk_update_mappings(Book, changed_rows)
+
+    return counts
+
+def _column_list(columns: list[str], prefix: str = "") -> str:
+    return ", ".join(f'{prefix}"{c}"' for c in columns)
+
+def copy_books(db, csv_path: str, mode: str = "insert", target: str = "books") -> dict:
+    """Postgres fast path: COPY the CSV into a temp table, then merge it into `target`.
+
+    mode is "insert" (only rows whose product_url is new) or "upsert".
+    """
+    table = Book.__table__
+    dialect = db.bind.dialect
+
+    with open(csv_path, encoding="utf-8-sig", newline="") as f:
+        header = next(csv.reader(f), [])
+    if "id" in header:
+        logger.warning("Column 'id' found in CSV. It will be ignored.")
+    columns = [c for c in header if c in table.columns and c != "id"]
+    staging_columns = ", ".join(
+        f'"{c}" {table.c[c].type.compile(dialect) if c in columns else "TEXT"}' for c in header
+    )
+    col_list = _column_list(columns)
+
+    db.execute(text(f"CREATE TEMP TABLE books_load ({staging_columns}, load_seq BIGSERIAL) ON COMMIT DROP"))
+    cursor = db.connection().connection.cursor()
+    with open(csv_path, encoding="utf-8-sig", newline="") as f:
+        cursor.copy_expert(f"COPY books_load ({_column_list(header)}) FROM STDIN WITH (FORMAT csv, HEADER true)", f)
+
+    # Category names are resolved to ids against the categories lookup.
+    source_columns, category_join = _column_list(columns, "l."), ""
+    if "category" in header:
+        db.execute(text(
+            "INSERT INTO categories (name) SELECT DISTINCT category FROM books_load "
+            "WHERE category IS NOT NULL ORDER BY category ON CONFLICT (name) DO NOTHING"
+        ))
+        columns.append("category_id")
+        col_list = _column_list(columns)
+        source_columns += ', c.id AS "category_id"'
+        category_join = "LEFT JOIN categories c ON c.name = l.category "
+
+    # Later duplicates of a product_url win, like in upsert_books.
+    db.execute(text(
+        f"CREATE TEMP TABLE books_src ON COMMIT DROP AS "
+        f"SELECT DISTINCT ON (l.product_url) {source_columns}, l.load_seq FROM books_load l {category_join}"
+        f"WHERE l.product_url IS NOT NULL ORDER BY l.product_url, l.load_seq DESC"
+    ))
+    total = db.execute(text("SELECT count(*) FROM books_src")).scalar()
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if not total:
+        return counts
+
+    if mode == "upsert":
+        assignments = ", ".join(f'"{c}" = s."{c}"' for c in columns if c != "product_url")
+        current = _column_list(columns, "b.")
+        incoming = _column_list(columns, "s.")
+        counts["updated"] = db.execute(text(
+            f"UPDATE {target} b SET {assignments} FROM books_src s "
+            f"WHERE b.product_url = s.product_url AND ({current}) IS DISTINCT FROM ({incoming})"
+        )).rowcount
+    counts["inserted"] = db.execute(text(
+        f"INSERT INTO {target} ({col_list}) SELECT {col_list} FROM books_src s "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {target} b WHERE b.product_url = s.product_url) ORDER BY load_seq"
+    )).rowcount
+    counts["unchanged"] = total - counts["inserted"] - counts["updated"]
+    return counts
+
+def create_staging_table(db) -> Table:
+    """Creates an empty, index-free copy of books to load a full reload into."""
+    metadata = MetaData()
+    # The copy's category_id foreign key needs the categories table alongside it.
+    Category.__table__.to_metadata(metadata)
+    staging = Book.__table__.to_metadata(metadata, name=STAGING_TABLE)
+    # Explicitly named indexes keep their name in the copy; rename them so
+    # they don't collide with the live table's (swap_in_staging renames back).
+    for index in staging.indexes:
+        if STAGING_TABLE not in index.name:
+            index.name = index.name.replace("ix_books_", f"ix_{STAGING_TABLE}_", 1)
+    db.execute(text(f"DROP TABLE IF EXISTS {STAGING_TABLE}"))
+    db.execute(CreateTable(staging))
+    search.add_search_column(db.connection(), STAGING_TABLE)
+    return staging
+
+def _begin_ddl_transaction(db):
+    # pysqlite only opens a transaction implicitly before DML, so without an
+    # explicit BEGIN each ALTER/DROP below would be committed on its own.
+    if db.bind.dialect.name == "sqlite" and not db.connection().connection.dbapi_connection.in_transaction:
+        db.execute(text("BEGIN"))
+
+def swap_in_staging(db, staging: Table):
+    """Indexes the staging table and atomically puts it in place of books.
+
+    Readers keep querying the old table until the transaction commits, then
+    see the complete new snapshot; the old table is dropped in the same step.
+    """
+    for index in staging.indexes:
+        db.execute(CreateIndex(index))
+    search.create_search_index(db.connection(), staging.name)
+    db.commit()
+
+    _begin_ddl_transaction(db)
+    if db.bind.dialect.name == "sqlite":
+        # Renaming books would repoint the FTS view at books_old; it is
+        # recreated over the new table below.
+        search.uninstall(db.connection())
+    db.execute(text("ALTER TABLE books RENAME TO books_old"))
+    db.execute(text(f"ALTER TABLE {STAGING_TABLE} RENAME TO books"))
+    db.execute(text("DROP TABLE books_old"))
+
+    # Give the indexes (and on Postgres the primary key and id sequence)
+    # back their usual names, now that the old table released them.
+    if db.bind.dialect.name == "postgresql":
+        indexes = db.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'books' AND indexname LIKE :prefix"
+        ), {"prefix": f"%{STAGING_TABLE}%"}).scalars().all()
+        for name in indexes:
+            db.execute(text(f'ALTER INDEX "{name}" RENAME TO "{name.replace(STAGING_TABLE, "books")}"'))
+        db.execute(text(f"ALTER SEQUENCE IF EXISTS {STAGING_TABLE}_id_seq RENAME TO books_id_seq"))
+        constraints = db.execute(text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = 'books'::regclass AND conname LIKE :prefix"
+        ), {"prefix": f"{STAGING_TABLE}%"}).scalars().all()
+        for name in constraints:
+            db.execute(text(f'ALTER TABLE books RENAME CONSTRAINT "{name}" TO "{name.replace(STAGING_TABLE, "books", 1)}"'))
+    else:
+        for index in staging.indexes:
+            db.execute(text(f"DROP INDEX {index.name}"))
+        for index in Book.__table__.indexes:
+            db.execute(CreateIndex(index))
+        # Recreates the FTS table, view and triggers and indexes the new books.
+        search.install(db.connection())
+    db.commit()
+
+def drop_staging_table():
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {STAGING_TABLE}"))
+
+def populate_database(overwrite: bool = False, upsert: bool = False, batch_size: int = LOAD_BATCH_SIZE,
+                      progress=None, raise_errors: bool = False):
+    """Loads FINAL_CSV_PATH into books.
+
+    The ORM path reads and commits the CSV `batch_size` rows at a time, so
+    memory stays bounded no matter how large the file is. `progress`, when
+    given, is called as progress(stage, rows) between transactions; with
+    `raise_errors` failures propagate instead of only being logged.
+    """
+    def report(stage: str, rows: int = 0):
+        if progress:
+            progress(stage, rows)
 
-def populate_database(overwrite: bool = False):
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        search.install(conn)
+    report("reading")
+
+    # Postgres streams the CSV straight through COPY; other databases go through the ORM.
+    use_copy = engine.dialect.name == "postgresql"
 
     try:
         if not os.path.exists(FINAL_CSV_PATH):
             logger.error(f"CSV file not found at path: {FINAL_CSV_PATH}")
+            if raise_errors:
+                raise FileNotFoundError(f"CSV file not found at path: {FINAL_CSV_PATH}")
             return
-        
-        df = pd.read_csv(FINAL_CSV_PATH)
-        
-        if df.empty:
-            logger.warning("The CSV file is empty. No data to populate.")
-            return
+
+        if not use_copy:
+            reader = pd.read_csv(FINAL_CSV_PATH, chunksize=batch_size)
+            first_chunk = next(reader, None)
+
+            if first_chunk is None or first_chunk.empty:
+                logger.warning("The CSV file is empty. No data to populate.")
+                return
     except Exception as e:
         logger.error(f"An error occurred while reading the CSV file: {e}")
+        if raise_errors:
+            raise
         return
 
     db = SessionLocal()
 
     try:
         existing_books = db.query(Book).count()
-        if existing_books > 0 and not overwrite:
-            logger.warning("Database already populated. Use 'overwrite=True' to reload data.")
+        if existing_books > 0 and not overwrite and not upsert:
+            logger.warning("Database already populated. Use 'overwrite=True' to reload data or 'upsert=True' to merge it.")
             logger.warning("skipping data population.")
             return
-        
-        if overwrite:
-            logger.info("Overwriting mode enabled. Clearing existing data.")
-            db.query(Book).delete()
+
+        # A full reload is built in a staging table and swapped in at the end,
+        # so readers never see a partially emptied books table.
+        staging = None
+        if overwrite and not upsert:
+            logger.info("Overwriting mode enabled. Loading data into a staging table.")
+            staging = create_staging_table(db)
             db.commit()
-            logger.info("Existing data cleared.")
-        
-        logger.info("Populating database with data from CSV...")
+        target = staging if staging is not None else Book.__table__
+        report("loading")
 
-        if 'id' in df.columns:
-            logger.warning("Column 'id' found in CSV. Removing it.")
-            df = df.drop(columns=['id'])
+        if use_copy:
+            mode = "upsert" if upsert else "insert"
+            logger.info(f"Populating {target.name} from CSV with COPY ({mode} mode)...")
+            counts = copy_books(db, FINAL_CSV_PATH, mode, target=target.name)
+            if not any(counts.values()):
+                logger.warning("The CSV file is empty. No data to populate.")
+                db.rollback()
+                if staging is not None:
+                    drop_staging_table()
+                return
+            db.commit()
+            report("loading", sum(counts.values()))
+        else:
+            logger.info(f"Populating {target.name} with data from CSV in chunks of {batch_size} rows...")
+
+            if 'id' in first_chunk.columns:
+                logger.warning("Column 'id' found in CSV. Removing it.")
+
+            counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+            for chunk in itertools.chain([first_chunk], reader):
+                books_data = _chunk_records(chunk)
+                if upsert:
+                    for key, value in upsert_books(db, books_data, batch_size).items():
+                        counts[key] += value
+                elif staging is not None:
+                    rows = _with_category_ids(db, books_data)
+                    db.execute(staging.insert(), [{k: v for k, v in row.items() if k in staging.c} for row in rows])
+                    counts["inserted"] += len(books_data)
+                else:
+                    db.bulk_insert_mappings(Book, _with_category_ids(db, books_data))
+                    counts["inserted"] += len(books_data)
+                db.commit()
+                logger.info(f"Committed chunk: {sum(counts.values())} rows processed so far.")
+                report("loading", sum(counts.values()))
 
-        books_data = df.to_dict(orient="records")
+        if staging is not None:
+            report("swapping", sum(counts.values()))
+            logger.info("Indexing the staging table and swapping it in place of books...")
+            swap_in_staging(db, staging)
 
-        db.bulk_insert_mappings(Book, books_data)
+        report("stats", sum(counts.values()))
+        crud.refresh_book_stats(db)
+        version = None
+        if staging is not None or counts["inserted"] or counts["updated"]:
+            version = crud.bump_dataset_version(db)
+            logger.info(f"Dataset version is now {version}.")
         db.commit()
-        logger.info("Database population completed successfully.")
+
+        if version is not None:
+            report("features", sum(counts.values()))
+            try:
+                features.write(db, version)
+            except Exception as e:
+                # The API builds it on first use instead.
+                logger.warning(f"Could not write the feature matrix for version {version}: {e}")
+
+        logger.info(
+            f"Database population completed: {counts['inserted']} inserted, "
+            f"{counts['updated']} updated, {counts['unchanged']} unchanged."
+        )
+        return counts
 
     except Exception as e:
         logger.error(f"An error occurred during database population: {e}")
         db.rollback()
+        if overwrite and not upsert:
+            drop_staging_table()
+        if raise_errors:
+            raise
     finally:
         db.close()
 
 if __name__ == "__main__":
 
     do_overwrite = "overwrite" in sys.argv
-    populate_database(overwrite=do_overwrite)
+    do_upsert = "upsert" in sys.argv
+    populate_database(overwrite=do_overwrite, upsert=do_upsert)
@@ -0,0 +1,85 @@
+import re
+from typing import Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+rating_map = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+book_columns = ["title", "price", "rating", "availability", "category", "image_url", "product_url"]
+detail_columns = ["upc", "description", "num_reviews"]
+page_count_re = re.compile(r"Page\s+\d+\s+of\s+(\d+)")
+
+# Listing pages only need the product pods and the pager; everything else
+# (header, sidebar, scripts) is skipped by the tree builder.
+listing_strainer = SoupStrainer(["article", "li"], class_=["product_pod", "next", "current"])
+
+
+
+def parse_categories(soup: BeautifulSoup, site_url: str) -> list[tuple[str, str]]:
+    return [
+        (a.text.strip(), urljoin(site_url, a.get('href')))
+        for a in soup.select(".side_categories ul li ul li a")
+    ]
+
+def parse_book(prod, cat_name: str, site_url: str, page_url: Optional[str] = None) -> dict:
+    title = prod.h3.a.get("title").strip()
+
+    price_text = prod.select_one("p.price_color").text.strip()
+    price_text = re.sub(r"[^\d.]", "", price_text)
+    price = float(price_text) if price_text else None
+
+    rating = next((rating_map[c] for c in prod.p["class"] if c in rating_map), None)
+
+    availability_text = prod.select_one("p.instock.availability").text.strip()
+    availability_match = re.search(r"\((\d+) available\)", availability_text)
+    availability = int(availability_match.group(1)) if availability_match else 0
+
+    image_url = urljoin(site_url, prod.select_one("div.image_container img")["src"])
+    # Product links are relative to the listing page ("../../../slug/index.html").
+    product_url = urljoin(page_url or site_url, prod.h3.a["href"])
+
+    return {
+        "title": title,
+        "price": price,
+        "rating": rating,
+        "availability": availability,
+        "category": cat_name,
+        "image_url": image_url,
+        "product_url": product_url
+    }
+
+def parse_listing(soup: BeautifulSoup, cat_name: str, page_url: str, site_url: str) -> tuple[list[dict], Optional[str], Optional[int]]:
+    """Parses one category listing page into (books, next page url, total page count)."""
+    books = [parse_book(prod, cat_name, site_url, page_url) for prod in soup.select("article.product_pod")]
+
+    next_link = soup.select_one("li.next a")
+    next_url = urljoin(page_url, next_link["href"]) if next_link else None
+
+    current = soup.select_one("li.current")
+    count_match = page_count_re.search(current.text) if current else None
+    page_count = int(count_match.group(1)) if count_match else None
+
+    return books, next_url, page_count
+
+def parse_listing_html(html: str, cat_name: str, page_url: str, site_url: str,
+                       parser: str = "html.parser") -> tuple[list[dict], Optional[str], Optional[int]]:
+    """Module-level entry point so listing pages can be parsed in a process pool."""
+    soup = BeautifulSoup(html, parser, parse_only=listing_strainer)
+    return parse_listing(soup, cat_name, page_url, site_url)
+
+def parse_product_html(html: str, parser: str = "html.parser") -> dict:
+    """Extracts the fields only shown on a product page."""
+    soup = BeautifulSoup(html, parser)
+    info = {row.th.text.strip(): row.td.text.strip() for row in soup.select("table.table-striped tr") if row.th and row.td}
+
+    availability_match = re.search(r"\((\d+) available\)", info.get("Availability", ""))
+    reviews = info.get("Number of reviews")
+    description = soup.select_one("#product_description ~ p")
+
+    return {
+        "upc": info.get("UPC"),
+        "description": description.text.strip() if description else None,
+        "availability": int(availability_match.group(1)) if availability_match else 0,
+        "num_reviews": int(reviews) if reviews and reviews.isdigit() else None
+    }
@@ -1,103 +1,205 @@
 import os
+import sys
 import argparse
-from urllib.parse import urljoin
+from typing import Optional
 
 import requests
-import pandas as pd
 from bs4 import BeautifulSoup
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.append(BASE_DIR)
+
+from scripts.http_cache import HttpCache
+from scripts.parsers import book_columns, detail_columns, parse_categories, parse_listing
+from scripts.writers import StreamingOutput, changes_path, merge_changes
+
 
 
 site = "https://books.toscrape.com/"
 headers = {"User-Agent": "Mozilla/5.0 (compatible; TechChallengeScraper/1.0)"}
-rating_map = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+default_cache_path = os.path.join(BASE_DIR, "data", "http_cache.sqlite")
 
 
 
-def get_soup(url: str) -> BeautifulSoup:
-    response = requests.get(url, headers=headers, timeout=30)
+def fetch_page(url: str, cache: HttpCache = None) -> tuple[str, bool]:
+    """Returns (body, changed); with a cache the request is conditional and a 304 reuses the stored body."""
+    request_headers = {**headers, **cache.conditional_headers(url)} if cache else headers
+    response = requests.get(url, headers=request_headers, timeout=30)
+    if cache and response.status_code == 304:
+        cache.touch(url)
+        return cache.get(url).body, False
     response.raise_for_status()
-    return BeautifulSoup(response.text, "html.parser")
-
-def extract_categories() -> list[tuple[str, str]]:
-    soup = get_soup(site)
-    return [
-        (a.text.strip(), urljoin(site, a.get('href')))
-        for a in soup.select(".side_categories ul li ul li a")
-    ]
-
-def extract_books_from_category(cat_name: str, cat_url: str, start_id: int = 1) -> tuple[list[dict], int]:
-    import re
-    books = []
+    changed = True
+    if cache:
+        changed = cache.store(url, response.text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return response.text, changed
+
+def get_soup(url: str, cache: HttpCache = None) -> BeautifulSoup:
+    return BeautifulSoup(fetch_page(url, cache)[0], "html.parser")
+
+def get_listing(cat_name: str, page_url: str, site_url: str = site,
+                cache: HttpCache = None) -> tuple[list[dict], Optional[str], Optional[int]]:
+    """parse_listing of a page, or its cached parse when the page didn't change (as in the async engine)."""
+    body, changed = fetch_page(page_url, cache)
+    parsed = cache.get_parsed(page_url) if cache and not changed else None
+    if parsed is None:
+        parsed = parse_listing(BeautifulSoup(body, "html.parser"), cat_name, page_url, site_url)
+        if cache:
+            cache.store_parsed(page_url, parsed)
+    return tuple(parsed)
+
+def extract_categories(site_url: str = site, cache: HttpCache = None) -> list[tuple[str, str]]:
+    soup = get_soup(site_url, cache)
+    return parse_categories(soup, site_url)
+
+def iter_category_pages(cat_name: str, cat_url: str, site_url: str = site, cache: HttpCache = None,
+                        completed=None):
+    """Yields (page_url, books, next_url, page_count) for each listing page of a category.
+
+    `completed` maps a page url to the (next_url, page_count) recorded by an
+    earlier run; those pages are skipped without being fetched.
+    """
     next_url = cat_url
-    book_id = start_id
 
     while next_url:
-        soup = get_soup(next_url)
-        products = soup.select("article.product_pod")
-
-        for prod in products:
-            title = prod.h3.a.get("title").strip()
-
-
-            price_text = prod.select_one("p.price_color").text.strip()
-            price_text = re.sub(r"[^\d.]", "", price_text)
-            price = float(price_text) if price_text else None
-
-
-            rating = next((rating_map[c] for c in prod.p["class"] if c in rating_map), None)
-            
-
-            availability_text = prod.select_one("p.instock.availability").text.strip()
-            
-
-            availability_match = re.search(r"\((\d+) available\)", availability_text)
-            
-
-            availability = int(availability_match.group(1)) if availability_match else 0
-            
-            image_url = urljoin(site, prod.select_one("div.image_container img")["src"])
-
-            product_url = urljoin(site, prod.h3.a["href"])
-
-            books.append({
-                "title": title,
-                "price": price,
-                "rating": rating,
-                "availability": availability,
-                "category": cat_name,
-                "image_url": image_url,
-                "product_url": product_url
-            })
+        page_url = next_url
+        done = completed(page_url) if completed else None
+        if done is not None:
+            next_url = done[0]
+            continue
+        page_books, next_url, page_count = get_listing(cat_name, page_url, site_url, cache)
+        yield page_url, page_books, next_url, page_count
+
+def extract_books_from_category(cat_name: str, cat_url: str, start_id: int = 1, site_url: str = site,
+                                cache: HttpCache = None) -> tuple[list[dict], int]:
+    books = []
+    book_id = start_id
 
-        next_link = soup.select_one("li.next a")
-        next_url = urljoin(cat_url, next_link["href"]) if next_link else None
+    for _, page_books, _, _ in iter_category_pages(cat_name, cat_url, site_url, cache):
+        books.extend(page_books)
 
     return books, book_id
 
 
 
-def run(out_path: str):
-    categories = extract_categories()
-    all_books = []
-    book_id = 1
-
-    for name, href in categories:
-        print(f"📚 Scraping category: {name}")
-        cat_books, book_id = extract_books_from_category(name, href, book_id)
-        all_books.extend(cat_books)
-
-    df = pd.DataFrame(all_books)
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    df.to_csv(out_path, index=False, encoding="utf-8-sig")
-
-    print(f"\n✅ Scraping completed. Data saved to {out_path}\n")
+def load_known_details() -> dict[str, dict]:
+    """Product-page fields already stored in the database, keyed by product_url."""
+    try:
+        from api.database import SessionLocal
+        from api.models import Book
+
+        db = SessionLocal()
+        try:
+            rows = db.query(Book.product_url, Book.upc, Book.description, Book.availability,
+                            Book.num_reviews).filter(Book.upc.isnot(None)).all()
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"⚠️  Could not read known products from the database, fetching every product page: {e}")
+        return {}
+
+    return {
+        r.product_url: {
+            "upc": r.upc,
+            "description": r.description,
+            "availability": r.availability if r.availability is not None else 0,
+            "num_reviews": r.num_reviews
+        } for r in rows
+    }
+
+def run(out_path: str, concurrency: int = None, rate: float = 10.0, site_url: str = site,
+        parse_workers: int = None, parser: str = "html.parser",
+        cache_path: str = None, incremental: bool = False,
+        fmt: str = "csv", row_group_size: int = 10_000, resume: bool = True,
+        detail_concurrency: int = None):
+    full_path = out_path
+    if incremental:
+        # Only changed categories are crawled into a side file, then merged
+        # into the full output, which must therefore already exist.
+        if not os.path.exists(full_path):
+            raise SystemExit(f"--incremental updates an existing full crawl, but {full_path} doesn't exist; "
+                             f"run a full crawl first.")
+        out_path = changes_path(full_path)
+        # Change detection lives in the asyncio engine, which needs the cache.
+        cache_path = cache_path or default_cache_path
+    if incremental or detail_concurrency:
+        concurrency = concurrency or 1
+
+    columns = book_columns + detail_columns if detail_concurrency else book_columns
+    output = StreamingOutput(out_path, columns, fmt=fmt, row_group_size=row_group_size, resume=resume)
+    if output.resumed:
+        print(f"⏩ Resuming from checkpoint: {output.resumed} page(s) already written")
+
+    try:
+        if concurrency:
+            from scripts.crawler import crawl
+            print(f"📚 Scraping all categories with {concurrency} concurrent workers")
+            known_details = load_known_details() if detail_concurrency else None
+            crawl(site_url, headers, output, concurrency=concurrency, rate=rate,
+                  parse_workers=parse_workers, parser=parser,
+                  cache_path=cache_path, incremental=incremental,
+                  detail_concurrency=detail_concurrency, known_details=known_details)
+        else:
+            cache = HttpCache(cache_path) if cache_path else None
+            try:
+                for name, href in extract_categories(site_url, cache):
+                    print(f"📚 Scraping category: {name}")
+                    for page in iter_category_pages(name, href, site_url, cache, output.completed):
+                        output.write_page(*page)
+            finally:
+                if cache:
+                    cache.close()
+    except BaseException:
+        output.close(complete=False)
+        print(f"\n⚠️  Scraping interrupted. {output.rows} row(s) saved; run again to resume.\n")
+        raise
+
+    output.close()
+    if incremental:
+        categories, rows = merge_changes(full_path, out_path, fmt)
+        if categories:
+            print(f"\n✅ Scraping completed. Rows of {categories} changed categories merged into {full_path} "
+                  f"({rows} rows)\n")
+        else:
+            print(f"\n✅ Scraping completed. Nothing changed; {full_path} left as is\n")
+        os.remove(out_path)
+        return
+    print(f"\n✅ Scraping completed. {output.rows} row(s) saved to {out_path}\n")
 
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Book Scraper")
     parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "..", "data", "books.csv"),
-                        help="Output CSV file path")
+                        help="Output file path")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Crawl with the asyncio engine using N concurrent fetches (default: sequential)")
+    parser.add_argument("--rate", type=float, default=10.0,
+                        help="Maximum requests per second per host in concurrent mode (0 disables the limit)")
+    parser.add_argument("--site", default=site,
+                        help="Base URL of the catalogue to crawl (e.g. a local mirror)")
+    parser.add_argument("--parse-workers", type=int, default=None,
+                        help="Processes parsing pages in concurrent mode (default: CPU count, 0 parses in the event loop)")
+    parser.add_argument("--parser", choices=["html.parser", "lxml"], default="html.parser",
+                        help="BeautifulSoup tree builder used for listing pages in concurrent mode")
+    parser.add_argument("--cache", nargs="?", const=default_cache_path, default=None,
+                        help="Persist an HTTP cache and send conditional requests (default path: data/http_cache.sqlite)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Re-crawl only categories whose pages changed since the cached crawl and "
+                             "replace their rows in the existing --out file")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="Output format; rows are appended page by page either way")
+    parser.add_argument("--row-group-size", type=int, default=10_000,
+                        help="Rows per Parquet row group")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Ignore the checkpoint of an interrupted crawl and start over")
+    parser.add_argument("--details", nargs="?", type=int, const=16, default=None, metavar="N",
+                        help="Also read each product page (UPC, description, stock, reviews) with up to N "
+                             "concurrent requests (default N: 16); products already enriched in the database are reused")
     args = parser.parse_args()
-    run(args.out)
+    run(args.out, concurrency=args.concurrency, rate=args.rate, site_url=args.site,
+        parse_workers=args.parse_workers, parser=args.parser,
+        cache_path=args.cache, incremental=args.incremental,
+        fmt=args.format, row_group_size=args.row_group_size, resume=not args.fresh,
+        detail_concurrency=args.details)
@@ -0,0 +1,183 @@
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from api.database import SessionLocal, engine
+from api.models import Base, LoadJob
+from scripts.load_to_db import populate_database
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 5))
+HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", 15))
+STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", 300))
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def update_job(job_id: int, **values):
+    with SessionLocal() as db:
+        db.execute(update(LoadJob).where(LoadJob.id == job_id).values(**values))
+        db.commit()
+
+
+def reap_stale_jobs(stale_seconds: float = STALE_SECONDS) -> int:
+    """Fails running jobs whose worker stopped sending heartbeats, releasing the run lock."""
+    cutoff = utcnow() - timedelta(seconds=stale_seconds)
+    with SessionLocal() as db:
+        result = db.execute(
+            update(LoadJob)
+            .where(LoadJob.status == "running", LoadJob.heartbeat_at < cutoff)
+            .values(status="failed", lock_key=None, finished_at=utcnow(),
+                    error=f"Worker stopped sending heartbeats for more than {stale_seconds:.0f}s.")
+        )
+        db.commit()
+    if result.rowcount:
+        logger.warning(f"Marked {result.rowcount} stale job(s) as failed.")
+    return result.rowcount
+
+
+def claim_next_job(worker: str):
+    """Moves the queued job to running.
+
+    Only one job can hold the "running" lock key, so the claim fails while
+    another load is in progress and the job stays queued.
+    """
+    with SessionLocal() as db:
+        job_id = db.query(LoadJob.id).filter(LoadJob.lock_key == "queued").scalar()
+        if job_id is None:
+            return None
+        now = utcnow()
+        try:
+            result = db.execute(
+                update(LoadJob)
+                .where(LoadJob.id == job_id, LoadJob.status == "queued")
+                .values(status="running", lock_key="running", worker=worker, stage="claimed",
+                        started_at=now, heartbeat_at=now)
+            )
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return None
+        if not result.rowcount:
+            return None
+        return db.get(LoadJob, job_id)
+
+
+class JobReporter:
+    """Progress callback for populate_database that records how long each stage took."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.timings: dict[str, float] = {}
+        self.stage = None
+        self.stage_started = time.perf_counter()
+
+    def _close_stage(self):
+        if self.stage is not None:
+            elapsed = time.perf_counter() - self.stage_started
+            self.timings[self.stage] = round(self.timings.get(self.stage, 0.0) + elapsed, 3)
+        self.stage_started = time.perf_counter()
+
+    def __call__(self, stage: str, rows: int = 0):
+        if stage != self.stage:
+            self._close_stage()
+            self.stage = stage
+        update_job(self.job_id, stage=stage, rows_processed=rows,
+                   stage_timings=dict(self.timings), heartbeat_at=utcnow())
+
+    def finish(self) -> dict:
+        self._close_stage()
+        self.stage = None
+        return dict(self.timings)
+
+
+class Heartbeat(threading.Thread):
+    """Keeps heartbeat_at fresh while a long stage (e.g. a COPY) runs without progress calls."""
+
+    def __init__(self, job_id: int, interval: float = HEARTBEAT_SECONDS):
+        super().__init__(daemon=True)
+        self.job_id = job_id
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                update_job(self.job_id, heartbeat_at=utcnow())
+            except Exception as e:
+                logger.warning(f"Could not record heartbeat for job {self.job_id}: {e}")
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run_job(job: LoadJob):
+    logger.info(f"Running load job {job.id} (overwrite={job.overwrite}, upsert={job.upsert}).")
+    reporter = JobReporter(job.id)
+    heartbeat = Heartbeat(job.id)
+    heartbeat.start()
+    try:
+        counts = populate_database(overwrite=job.overwrite, upsert=job.upsert,
+                                   progress=reporter, raise_errors=True)
+    except Exception as e:
+        heartbeat.stop()
+        update_job(job.id, status="failed", lock_key=None, error=str(e),
+                   stage_timings=reporter.finish(), finished_at=utcnow())
+        logger.error(f"Load job {job.id} failed: {e}")
+        return
+    heartbeat.stop()
+    # populate_database returns nothing when it skips (empty CSV, already populated table).
+    update_job(job.id, status="succeeded", lock_key=None, result=counts,
+               stage="done" if counts is not None else "skipped",
+               stage_timings=reporter.finish(), finished_at=utcnow())
+    logger.info(f"Load job {job.id} finished: {counts}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs queued book load jobs one at a time.")
+    parser.add_argument("--once", action="store_true", help="Process at most one job and exit")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info("Stop requested; exiting after the current job.")
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    logger.info(f"Worker {worker} polling for load jobs every {POLL_SECONDS}s.")
+    while not stopping.is_set():
+        reap_stale_jobs()
+        job = claim_next_job(worker)
+        if job is not None:
+            run_job(job)
+        if args.once:
+            break
+        if job is None:
+            stopping.wait(POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import os
+import csv
+import glob
+import json
+import shutil
+from typing import Optional
+
+
+column_types = {"price": "float64", "rating": "int64", "availability": "int64"}
+
+
+
+class CsvRowWriter:
+    """Appends rows to a CSV file, flushing after every page."""
+
+    def __init__(self, path: str, columns: list[str], offset: Optional[int] = None):
+        resume = offset is not None and os.path.exists(path)
+        if resume:
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+            self.file = open(path, "a", encoding="utf-8", newline="")
+        else:
+            self.file = open(path, "w", encoding="utf-8-sig", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+        if not resume:
+            self.writer.writeheader()
+            self.file.flush()
+
+    def write(self, rows: list[dict]) -> bool:
+        self.writer.writerows(rows)
+        self.file.flush()
+        return True
+
+    def position(self) -> int:
+        # Still answered once closed, so the final checkpoint can be committed.
+        return self.offset if self.file.closed else self.file.tell()
+
+    def close(self, complete: bool = True):
+        if not self.file.closed:
+            self.offset = self.file.tell()
+            self.file.close()
+
+
+class ParquetRowWriter:
+    """Buffers rows into row groups, each persisted as its own part file.
+
+    A Parquet file is only readable once its footer is written, so every row
+    group lands atomically in `<path>.parts/` and the parts are stitched into
+    the final file, one row group at a time, when the crawl completes.
+    """
+
+    def __init__(self, path: str, columns: list[str], row_group_size: int = 10_000, parts: Optional[int] = None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet output requires 'pyarrow' (pip install pyarrow).") from e
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.parts_dir = f"{path}.parts"
+        self.columns = columns
+        self.schema = pa.schema([(c, pa.type_for_alias(column_types.get(c, "string"))) for c in columns])
+        self.row_group_size = row_group_size
+        self.buffer: list[dict] = []
+        if parts is None:
+            shutil.rmtree(self.parts_dir, ignore_errors=True)
+        os.makedirs(self.parts_dir, exist_ok=True)
+        self.parts = parts or 0
+        # Parts written after the last checkpoint belong to pages that will be crawled again.
+        for part in self._part_files()[self.parts:]:
+            os.remove(part)
+
+    def _part_files(self) -> list[str]:
+        return sorted(glob.glob(os.path.join(self.parts_dir, "part-*.parquet")))
+
+    def write(self, rows: list[dict]) -> bool:
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.row_group_size:
+            self._flush()
+            return True
+        return False
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        table = self.pa.Table.from_pylist(self.buffer, schema=self.schema)
+        part = os.path.join(self.parts_dir, f"part-{self.parts:05d}.parquet")
+        self.pq.write_table(table, f"{part}.tmp")
+        os.replace(f"{part}.tmp", part)
+        self.parts += 1
+        self.buffer = []
+
+    def position(self) -> int:
+        return self.parts
+
+    def close(self, complete: bool = True):
+        self._flush()
+        if not complete:
+            return
+        with self.pq.ParquetWriter(f"{self.path}.tmp", self.schema) as writer:
+            for part in self._part_files():
+                for batch in self.pq.ParquetFile(part).iter_batches(batch_size=self.row_group_size):
+                    writer.write_table(self.pa.Table.from_batches([batch], schema=self.schema))
+        os.replace(f"{self.path}.tmp", self.path)
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+
+class Checkpoint:
+    """JSON record of the listing pages whose rows are durably written."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state = {"format": None, "columns": None, "position": None, "pages": {}}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    @property
+    def pages(self) -> dict:
+        return self.state["pages"]
+
+    def save(self):
+        with open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class StreamingOutput:
+    """Writes listing pages as they arrive and checkpoints them once durable.
+
+    When a checkpoint for the same output exists, the crawl resumes: pages it
+    lists are neither fetched nor written again, and the CSV is truncated
+    back to the last checkpointed offset to drop any half-written page.
+    """
+
+    def __init__(self, out_path: str, columns: list[str], fmt: str = "csv",
+                 row_group_size: int = 10_000, resume: bool = True):
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        self.out_path = out_path
+        self.checkpoint = Checkpoint(f"{out_path}.checkpoint.json")
+        state = self.checkpoint.state
+        if not resume or state.get("format") != fmt or state.get("columns") != columns:
+            self.checkpoint.state = {"format": fmt, "columns": columns, "position": None, "pages": {}}
+        self.resumed = len(self.checkpoint.pages)
+
+        position = self.checkpoint.state["position"] if self.resumed else None
+        if fmt == "parquet":
+            self.writer = ParquetRowWriter(out_path, columns, row_group_size, parts=position)
+        else:
+            self.writer = CsvRowWriter(out_path, columns, offset=position)
+        self.pending: dict[str, list] = {}
+        self.rows = 0
+
+    def completed(self, url: str) -> Optional[tuple[Optional[str], Optional[int]]]:
+        """Returns (next_url, page_count) for a page finished by a previous run."""
+        page = self.checkpoint.pages.get(url)
+        return tuple(page) if page is not None else None
+
+    def write_page(self, url: str, books: list[dict], next_url: Optional[str], page_count: Optional[int]):
+        self.pending[url] = [next_url, page_count]
+        self.rows += len(books)
+        if self.writer.write(books):
+            self._commit()
+
+    def skip_page(self, url: str, next_url: Optional[str], page_count: Optional[int]):
+        self.pending[url] = [next_url, page_count]
+
+    def _commit(self):
+        self.checkpoint.pages.update(self.pending)
+        self.checkpoint.state["position"] = self.writer.position()
+        self.checkpoint.save()
+        self.pending = {}
+
+    def close(self, complete: bool = True):
+        self.writer.close(complete)
+        if complete:
+            self.checkpoint.remove()
+        else:
+            self._commit()
+
+
+def changes_path(out_path: str) -> str:
+    """Where an incremental crawl writes its rows: `books.csv` -> `books.changes.csv`."""
+    root, ext = os.path.splitext(out_path)
+    return f"{root}.changes{ext}"
+
+
+def merge_changes(out_path: str, changes: str, fmt: str = "csv") -> tuple[int, int]:
+    """Replaces the rows of every category present in `changes` inside the full
+    output at `out_path`; rows of the other categories are kept as they are.
+
+    Returns (categories replaced, rows written); with no changes `out_path`
+    is left untouched. The merged file is renamed into place, so `out_path`
+    always holds a complete catalogue.
+    """
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+        new = pq.read_table(changes)
+        categories = pa.array(sorted(set(new.column("category").to_pylist())), type=pa.string())
+        if not len(categories):
+            return 0, 0
+        old = pq.read_table(out_path)
+        kept = old.filter(pc.invert(pc.is_in(old.column("category"), value_set=categories)))
+        merged = pa.concat_tables([kept, new], promote_options="permissive")
+        pq.write_table(merged, f"{out_path}.tmp")
+        os.replace(f"{out_path}.tmp", out_path)
+        return len(categories), merged.num_rows
+
+    with open(changes, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        new_columns, new_rows = reader.fieldnames or [], list(reader)
+    categories = {row["category"] for row in new_rows}
+    if not categories:
+        return 0, 0
+    written = 0
+    with open(out_path, encoding="utf-8-sig", newline="") as src, \
+            open(f"{out_path}.tmp", "w", encoding="utf-8-sig", newline="") as dst:
+        reader = csv.DictReader(src)
+        columns = list(reader.fieldnames or []) + [c for c in new_columns if c not in (reader.fieldnames or [])]
+        writer = csv.DictWriter(dst, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        for row in reader:
+            if row["category"] not in categories:
+                writer.writerow(row)
+                written += 1
+        writer.writerows(new_rows)
+    os.replace(f"{out_path}.tmp", out_path)
+    return len(categories), written + len(new_rows)
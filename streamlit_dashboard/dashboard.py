@@ -52,7 +52,10 @@ def load_data(_engine):
     
     try:
         with _engine.connect() as conn:
-            query = "SELECT title, price, rating, availability, category FROM books"
+            query = (
+                "SELECT b.title, b.price, b.rating, b.availability, c.name AS category "
+                "FROM books b LEFT JOIN categories c ON c.id = b.category_id"
+            )
             df = pd.read_sql(query, conn)
         logger.info(f"Data loaded successfully: {len(df)} rows.")
         return df
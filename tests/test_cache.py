@@ -0,0 +1,141 @@
+import os
+import sys
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from api import cache
+from api.cache import LRUCache, RedisCache, ResponseCache
+from api.pagination import next_link
+
+
+class FakeRedis:
+    """The slice of redis-py that RedisCache uses; `down` makes every call fail like a lost connection."""
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.ttls: dict[str, int] = {}
+        self.down = False
+
+    def get(self, key):
+        if self.down:
+            raise ConnectionError("Connection refused")
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        if self.down:
+            raise ConnectionError("Connection refused")
+        self.data[key] = value
+        self.ttls[key] = ex
+
+
+def make_request(path: str, query: str = "", host: str = "testserver") -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(),
+                    "headers": [(b"host", host.encode())], "server": (host, 80), "scheme": "http", "root_path": ""})
+
+
+def test_redis_cache_prefixes_keys_and_sets_ttl():
+    client = FakeRedis()
+    shared = RedisCache(client, ttl=60)
+    shared.set("v1:/books?", b"body")
+    assert client.data == {"books-api:v1:/books?": b"body"}
+    assert client.ttls == {"books-api:v1:/books?": 60}
+    assert shared.get("v1:/books?") == b"body"
+
+
+def test_shared_entry_serves_other_workers():
+    client = FakeRedis()
+    first = ResponseCache(LRUCache(), RedisCache(client))
+    second = ResponseCache(LRUCache(), RedisCache(client))
+    assert first.get("key") == (None, "miss")
+    first.set("key", b"body")
+    assert second.get("key") == (b"body", "hit_shared")
+    # The shared hit is kept locally for the next request.
+    assert second.get("key") == (b"body", "hit_local")
+
+
+def test_redis_down_falls_back_to_local_cache():
+    client = FakeRedis()
+    client.down = True
+    response_cache = ResponseCache(LRUCache(), RedisCache(client))
+    assert response_cache.get("key") == (None, "miss")
+    response_cache.set("key", b"body")
+    assert response_cache.get("key") == (b"body", "hit_local")
+    assert client.data == {}
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    client = FakeRedis()
+    version = {"value": 1}
+
+    async def dataset_version(db):
+        return version["value"]
+
+    monkeypatch.setattr(cache, "response_cache", ResponseCache(LRUCache(), RedisCache(client)))
+    monkeypatch.setattr(cache, "dataset_version", dataset_version)
+    return client, version
+
+
+def test_cached_response_is_keyed_on_dataset_version(shared_cache):
+    client, version = shared_cache
+    calls = []
+
+    async def compute(current):
+        calls.append(current)
+        return [{"category": "Travel", "version": current}]
+
+    def get():
+        # A fresh local LRU per request, as if each one hit another worker.
+        cache.response_cache.local = LRUCache()
+        return asyncio.run(cache.cached_response(make_request("/api/v1/categories", "limit=10"), None,
+                                                 "categories", None, compute))
+
+    first, second = get(), get()
+    assert first.body == second.body
+    assert first.headers["etag"] == second.headers["etag"]
+    assert calls == [1]
+
+    version["value"] = 2
+    third = get()
+    assert calls == [1, 2]
+    assert b'"version":2' in third.body
+    assert third.headers["etag"] != first.headers["etag"]
+    assert sorted(client.data) == ["books-api:v1:/api/v1/categories?limit=10",
+                                   "books-api:v2:/api/v1/categories?limit=10"]
+
+
+def test_cached_response_computes_when_redis_is_down(shared_cache):
+    client, _ = shared_cache
+    client.down = True
+    calls = []
+
+    async def compute(version):
+        calls.append(1)
+        return {"total_books": 3}
+
+    response = asyncio.run(cache.cached_response(make_request("/api/v1/stats/overview"), None,
+                                                 "stats_overview", None, compute))
+    assert response.status_code == 200
+    assert response.body == b'{"total_books":3}'
+    assert calls == [1]
+
+
+def test_cached_link_header_works_for_any_host(shared_cache):
+    async def compute(version):
+        return [{"id": 1}, {"id": 2}]
+
+    def get(host):
+        cache.response_cache.local = LRUCache()
+        request = make_request("/api/v1/books", "limit=2", host)
+        return asyncio.run(cache.cached_response(
+            request, None, "books", None, compute,
+            headers=lambda books: {"Link": next_link(request.url, "abc")}
+        ))
+
+    first, second = get("api.internal:8000"), get("books.example.com")
+    assert first.headers["link"] == second.headers["link"] == '</api/v1/books?limit=2&cursor=abc>; rel="next"'
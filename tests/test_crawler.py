@@ -0,0 +1,137 @@
+import os
+import sys
+import csv
+import shutil
+import asyncio
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from scripts import scraping
+from scripts.crawler import AsyncCrawler, crawl
+from scripts.parsers import book_columns, detail_columns
+from scripts.scraping import headers, run
+from scripts.writers import StreamingOutput
+
+
+# Trimmed copies of books.toscrape.com pages: Travel spans two listing pages, Poetry one.
+FIXTURE_SITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "books_site")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    """Serves a copy of the fixture site (so tests may edit pages) on a local port."""
+    root = tmp_path / "site"
+    shutil.copytree(FIXTURE_SITE, root)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/", root
+    server.shutdown()
+    server.server_close()
+
+
+def read_rows(path) -> list[dict]:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return sorted(csv.DictReader(f), key=lambda row: row["product_url"])
+
+
+def test_async_crawl_reads_every_listing_page(site, tmp_path):
+    site_url, _ = site
+    out = tmp_path / "books.csv"
+    output = StreamingOutput(str(out), book_columns)
+    crawl(site_url, headers, output, concurrency=4, rate=0, parse_workers=0)
+    output.close()
+
+    rows = read_rows(out)
+    assert len(rows) == 4
+    assert [row["category"] for row in rows].count("Travel") == 3
+    see_america = next(row for row in rows if row["title"] == "See America")
+    assert see_america["product_url"] == f"{site_url}catalogue/see-america_732/index.html"
+    assert see_america["price"] == "48.87"
+    assert see_america["rating"] == "3"
+    assert not os.path.exists(f"{out}.checkpoint.json")
+
+
+def test_async_crawl_matches_sequential_crawl(site, tmp_path):
+    site_url, _ = site
+    run(str(tmp_path / "sequential.csv"), site_url=site_url)
+    run(str(tmp_path / "async.csv"), concurrency=4, rate=0, parse_workers=0, site_url=site_url)
+    assert read_rows(tmp_path / "async.csv") == read_rows(tmp_path / "sequential.csv")
+
+
+def test_async_crawl_reads_product_details(site, tmp_path):
+    site_url, _ = site
+    out = tmp_path / "books.csv"
+    output = StreamingOutput(str(out), book_columns + detail_columns)
+    crawl(site_url, headers, output, concurrency=2, rate=0, parse_workers=0, detail_concurrency=2)
+    output.close()
+
+    rows = {row["title"]: row for row in read_rows(out)}
+    assert rows["See America"]["upc"] == "f9705c362f070608"
+    assert rows["See America"]["num_reviews"] == "2"
+    assert rows["See America"]["availability"] == "14"
+    assert rows["A Light in the Attic"]["description"] == "Poems and drawings."
+
+
+def test_incremental_crawl_merges_changed_categories(site, tmp_path):
+    site_url, root = site
+    out = tmp_path / "books.csv"
+    options = dict(concurrency=2, rate=0, parse_workers=0, site_url=site_url, cache_path=str(tmp_path / "cache.sqlite"))
+    run(str(out), **options)
+    full = out.read_bytes()
+
+    run(str(out), incremental=True, **options)
+    assert out.read_bytes() == full
+
+    poetry = root / "catalogue" / "category" / "books" / "poetry_23" / "index.html"
+    poetry.write_text(poetry.read_text(encoding="utf-8").replace("51.77", "12.34"), encoding="utf-8")
+    modified = os.stat(poetry).st_mtime + 60
+    os.utime(poetry, (modified, modified))
+    run(str(out), incremental=True, **options)
+
+    rows = {row["title"]: row for row in read_rows(out)}
+    assert len(rows) == 4
+    assert rows["A Light in the Attic"]["price"] == "12.34"
+    assert rows["See America"]["price"] == "48.87"
+    assert not os.path.exists(tmp_path / "books.changes.csv")
+
+
+def test_fetch_without_retries(site, tmp_path):
+    site_url, _ = site
+    crawler = AsyncCrawler(site_url, headers, StreamingOutput(str(tmp_path / "books.csv"), book_columns),
+                           rate=0, retries=0)
+
+    async def fetch(url):
+        async with httpx.AsyncClient() as client:
+            crawler.client = client
+            return await crawler.fetch(url)
+
+    assert "Travel" in asyncio.run(fetch(site_url)).body
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(fetch(f"{site_url}missing.html"))
+
+
+def test_sequential_crawl_reuses_parse_of_unchanged_pages(site, tmp_path, monkeypatch):
+    site_url, _ = site
+    parsed = []
+    parse_listing = scraping.parse_listing
+    monkeypatch.setattr(scraping, "parse_listing", lambda *args: parsed.append(args[2]) or parse_listing(*args))
+    options = dict(site_url=site_url, cache_path=str(tmp_path / "cache.sqlite"))
+
+    run(str(tmp_path / "first.csv"), **options)
+    assert len(parsed) == 3
+    run(str(tmp_path / "second.csv"), **options)
+    assert len(parsed) == 3
+    assert read_rows(tmp_path / "second.csv") == read_rows(tmp_path / "first.csv")
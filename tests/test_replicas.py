@@ -0,0 +1,100 @@
+import os
+import sys
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from api import replicas
+from api.replicas import ReplicaRouter
+
+
+def set_version(path, version: int):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS dataset_version (id INTEGER PRIMARY KEY, version INTEGER)"))
+        conn.execute(text("INSERT OR REPLACE INTO dataset_version (id, version) VALUES (1, :version)"),
+                     {"version": version})
+    engine.dispose()
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """A primary and two replica SQLite files, all at dataset version 3; versions are re-read on every pick."""
+    paths = {name: tmp_path / f"{name}.db" for name in ("primary", "replica0", "replica1")}
+    for path in paths.values():
+        set_version(path, 3)
+    monkeypatch.setattr(replicas, "engine", create_engine(f"sqlite:///{paths['primary']}"))
+    monkeypatch.setattr(replicas, "async_engine", create_async_engine(f"sqlite+aiosqlite:///{paths['primary']}"))
+    monkeypatch.setattr(replicas, "REPLICA_CHECK_SECONDS", 0)
+    return paths
+
+
+def make_router(paths, strategy: str = "round_robin") -> ReplicaRouter:
+    return ReplicaRouter([f"sqlite:///{paths['replica0']}", f"sqlite:///{paths['replica1']}"], strategy)
+
+
+def picked(router: ReplicaRouter, times: int = 4) -> list:
+    return [getattr(router.pick(), "name", None) for _ in range(times)]
+
+
+def test_round_robin_alternates_between_up_to_date_replicas(databases):
+    router = make_router(databases)
+    assert picked(router) == ["replica0", "replica1", "replica0", "replica1"]
+
+
+def test_lagging_replica_is_skipped_until_it_catches_up(databases):
+    router = make_router(databases)
+    set_version(databases["primary"], 4)
+    set_version(databases["replica0"], 4)
+    assert picked(router) == ["replica0"] * 4
+
+    set_version(databases["replica1"], 4)
+    assert set(picked(router)) == {"replica0", "replica1"}
+
+
+def test_reads_fall_back_to_primary(databases):
+    router = make_router(databases)
+    set_version(databases["primary"], 5)
+    assert picked(router) == [None] * 4
+
+    set_version(databases["replica0"], 5)
+    set_version(databases["replica1"], 5)
+    # A replica whose query fails is treated as unavailable.
+    with create_engine(f"sqlite:///{databases['replica1']}").begin() as conn:
+        conn.execute(text("DROP TABLE dataset_version"))
+    assert picked(router) == ["replica0"] * 4
+    assert router.replicas[1].version is None
+
+
+def test_read_session_binds_to_the_chosen_database(databases, monkeypatch):
+    router = make_router(databases)
+    monkeypatch.setattr(replicas, "read_router", router)
+
+    sessions = replicas.get_read_db()
+    db = next(sessions)
+    assert db.get_bind() is router.replicas[0].engine
+    sessions.close()
+
+    set_version(databases["primary"], 6)
+    sessions = replicas.get_read_db()
+    db = next(sessions)
+    # Lagging replicas: the session gets SessionLocal's own (primary) bind.
+    assert db.get_bind() not in [replica.engine for replica in router.replicas]
+    sessions.close()
+
+
+def test_async_pick_follows_the_same_rules(databases):
+    router = make_router(databases)
+
+    async def pick(times: int = 3) -> list:
+        return [getattr(await router.pick_async(), "name", None) for _ in range(times)]
+
+    assert asyncio.run(pick()) == ["replica0", "replica1", "replica0"]
+    set_version(databases["primary"], 7)
+    set_version(databases["replica1"], 7)
+    assert asyncio.run(pick()) == ["replica1"] * 3
@@ -0,0 +1,62 @@
+import os
+import sys
+import asyncio
+
+from sqlalchemy import create_engine, delete, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from pydantic import TypeAdapter
+from starlette.requests import Request
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from api import cache, crud_async, models, schemas, snapshot
+from api.cache import LRUCache, ResponseCache
+
+
+def make_request(path: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"",
+                    "headers": [], "server": ("testserver", 80), "scheme": "http", "root_path": ""})
+
+
+def test_cached_stats_follow_the_dataset_version(tmp_path, monkeypatch):
+    path = tmp_path / "books.db"
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(models.Category.__table__.insert(), [{"id": 1, "name": "Travel"}])
+        conn.execute(models.Book.__table__.insert(), [
+            {"title": f"Book {i}", "price": 10.0 + i, "rating": 1 + i % 5, "availability": 1,
+             "category_id": 1, "product_url": f"https://example.com/{i}"} for i in range(4)
+        ])
+        conn.execute(models.DatasetVersion.__table__.insert(), [{"id": 1, "version": 1}])
+
+    monkeypatch.setattr(snapshot, "ANALYTICS_BACKEND", "memory")
+    monkeypatch.setattr(snapshot, "_snapshot", None)
+    monkeypatch.setattr(snapshot, "_checked_at", 0.0)
+    monkeypatch.setattr(cache, "response_cache", ResponseCache(LRUCache()))
+    # Re-read the version on every request; the snapshot has its own, longer timer.
+    monkeypatch.setattr(cache, "VERSION_CHECK_SECONDS", 0)
+
+    async def overview():
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        try:
+            async with async_sessionmaker(async_engine)() as db:
+                return await cache.cached_response(
+                    make_request("/api/v1/stats/overview"), db, "stats_overview",
+                    TypeAdapter(schemas.StatsOverview), lambda version: crud_async.get_stats_overview(db, version)
+                )
+        finally:
+            await async_engine.dispose()
+
+    first = asyncio.run(overview())
+    assert b'"total_books":4' in first.body
+
+    with engine.begin() as conn:
+        conn.execute(delete(models.Book.__table__).where(models.Book.__table__.c.id > 2))
+        conn.execute(update(models.DatasetVersion.__table__).values(version=2))
+
+    second = asyncio.run(overview())
+    assert b'"total_books":2' in second.body
+    assert second.headers["etag"] != first.headers["etag"]
+    assert snapshot._snapshot.fingerprint == (2,)